@@ -2,11 +2,35 @@ __author__ = 'GCassani'
 
 """Function to compute pairwise correlations and print them"""
 
+import operator
 import numpy as np
 from analysis.plot import scatter
 
 
-def compute_correlations(statistics, measures, items, pos=None):
+def correlation_matrix(data):
+
+    """
+    :param data:            a NumPy array with one variable per row and one observation per column; a 3d array is
+                            treated as a stack of such 2d arrays
+    :return correlations:   a NumPy array containing the Pearson correlation between each pair of rows (for each 2d
+                            array in the stack if a 3d array is passed)
+
+    Rows are centered and scaled to unit length in single precision, so that all pairwise correlations are obtained
+    from a single (batched) matrix product between the normalized rows and their transpose.
+    """
+
+    centered = data.astype(np.float32, copy=False)
+    centered = centered - centered.mean(axis=-1, keepdims=True)
+    normalized = centered / np.linalg.norm(centered, axis=-1, keepdims=True)
+    correlations = np.matmul(normalized, np.swapaxes(normalized, -1, -2))
+
+    return correlations
+
+
+########################################################################################################################
+
+
+def collect_data(statistics, measures, items, pos=None):
 
     """
     :param statistics:
@@ -16,16 +40,34 @@ def compute_correlations(statistics, measures, items, pos=None):
     :return:
     """
 
-    data = np.zeros([len(measures), len(items)])
-    for idx, key in enumerate(items):
-        for measure in measures:
-            if measure == 'frequencies':
-                value = statistics[measure][key]
-            else:
-                value = statistics[measure][pos][key] if pos else statistics[measure][key]
-            data[measures[measure], idx] = value
+    # fill one row per measure, in the order given by the measure indices, gathering the values of all items from
+    # the dictionary of each measure at once and stacking the rows in a single array; single precision is enough for
+    # correlations and plots, and halves the memory needed for the array
+    items = list(items)
+    rows = []
+    for measure, _ in sorted(measures.items(), key=operator.itemgetter(1)):
+        values = statistics[measure][pos] if pos and measure != 'frequencies' else statistics[measure]
+        rows.append(np.fromiter((values[key] for key in items), dtype=np.float32, count=len(items)))
+    data = np.vstack(rows)
 
-    correlations = np.corrcoef(data)
+    return data
+
+
+########################################################################################################################
+
+
+def compute_correlations(statistics, measures, items, pos=None):
+
+    """
+    :param statistics:
+    :param measures:
+    :param items:
+    :param pos:
+    :return:
+    """
+
+    data = collect_data(statistics, measures, items, pos=pos)
+    correlations = correlation_matrix(data)
 
     return correlations, data
 
@@ -41,14 +83,13 @@ def print_correlations(correlations, measures):
     :return:
     """
 
+    # consider each pair of measures once, using the row indices bound by the loops rather than looking them up again
     done = []
-    for measure1, id1 in measures.items():
-        for measure2, id2 in measures.items():
-            pair = {measure1, measure2}
-            if pair not in done and id1 != id2:
-                print("\t%s ~ %s: %0.4f" %
-                      (measure1, measure2, correlations[measures[measure1], measures[measure2]]))
-                done.append(pair)
+    sorted_measures = sorted(measures.items(), key=operator.itemgetter(1))
+    for idx, (measure1, id1) in enumerate(sorted_measures):
+        for measure2, id2 in sorted_measures[idx + 1:]:
+            print("\t%s ~ %s: %0.4f" % (measure1, measure2, correlations[id1, id2]))
+            done.append({measure1, measure2})
 
     return done
 
@@ -92,8 +133,13 @@ def cue_correlations(cue_statistics, measures, cues):
 
     measure2id = {m: i for i, m in enumerate(measures)}
 
-    for pos_tag in cue_statistics['pos_tags']:
-        print("%s" % pos_tag)
+    # stack the data of all PoS tags in a single 3d array, so that the correlations for every PoS tag are computed
+    # together in one batched matrix product; all PoS tags share the same cues, hence the same number of columns
+    cues = list(cues)
+    pos_tags = list(cue_statistics['pos_tags'])
+    pos_data = np.stack([collect_data(cue_statistics, measure2id, cues, pos=pos_tag) for pos_tag in pos_tags])
+    pos_correlations = correlation_matrix(pos_data)
 
-        correlations, pos_data = compute_correlations(cue_statistics, measure2id, cues, pos=pos_tag)
+    for pos_tag, correlations in zip(pos_tags, pos_correlations):
+        print("%s" % pos_tag)
         print_correlations(correlations, measure2id)
@@ -4,8 +4,9 @@ __author__ = 'GCassani'
 
 import os
 from collections import defaultdict
+from matrix.matrix import reverse_ids
 from matrix.nodes import write_ranked_nodes
-from matrix.statistics import median_absolute_deviation, activations, norm
+from matrix.statistics import vector_statistics
 from phonological_bootstrapping.helpers import store_dict
 from analysis.plot import plot_ranks
 
@@ -32,21 +33,22 @@ def pos_filter(input_dict, target):
 ########################################################################################################################
 
 
-def cue_measures(weight_matrix, row_ids, col_ids, plots_folder):
+def cue_measures(weight_matrix, row_ids, col_ids, plots_folder, reversed_row_ids=None):
 
     """
-    :param weight_matrix:   array-like structure
-    :param row_ids:         a dictionary mapping row numerical indices to strings
-    :param col_ids:         a dictionary mapping column numerical indices to strings
-    :param plots_folder:    the path to the folder where plots and .txt files are created
-    :return cue_values:     a dictionary of dictionaries, where first-level keys are strings identifying PoS tags and
-                            second order keys are outcome strings belonging to each PoS tag.
+    :param weight_matrix:       array-like structure
+    :param row_ids:             a dictionary mapping row numerical indices to strings
+    :param col_ids:             a dictionary mapping column numerical indices to strings
+    :param plots_folder:        the path to the folder where plots and .txt files are created
+    :param reversed_row_ids:    a NumPy array containing at each row index the corresponding string, as built with
+                                reverse_ids from row_ids. Default is None, meaning that it is built here
+    :return cue_values:         a dictionary of dictionaries, where first-level keys are strings identifying PoS tags
+                                and second order keys are outcome strings belonging to each PoS tag.
     """
 
-    # check whether the provided folder path points to an existing folder, and create it if it doesn't already exist
-    # then checks that the path ends with a slash, and add one if it doesn't
-    if not os.path.isdir(plots_folder):
-        os.makedirs(plots_folder)
+    # create the provided folder if it doesn't already exist: exist_ok also covers the folder being created by another
+    # process in the meantime, e.g. when measures are computed in parallel
+    os.makedirs(plots_folder, exist_ok=True)
 
     cue_values = defaultdict(dict)
     measures = ["MAD", "activations", "1-norm", "2-norm"]
@@ -56,6 +58,9 @@ def cue_measures(weight_matrix, row_ids, col_ids, plots_folder):
     pos_tags = {outcome.split("|")[1] for outcome in col_ids}
     cue_values['pos_tags'] = pos_tags
 
+    # flip the row identifiers dictionary once, so that strings can be retrieved by indexing an array with row indices
+    reversed_mapping = reverse_ids(row_ids) if reversed_row_ids is None else reversed_row_ids
+
     # for every PoS tag, get the columns matching outcomes that share a given PoS tag and the column indices that
     # identify them; compute the MAD of each row vector; rank cues according to their MAD values given a specific PoS
     # tag; plot the MAD values against the rank of the cue, separately for each PoS tag
@@ -63,21 +68,14 @@ def cue_measures(weight_matrix, row_ids, col_ids, plots_folder):
 
         outcome_indices = pos_filter(col_ids, pos)
 
-        # get the MAD value for each row over the columns belonging to a given PoS tag; store values in a dictionary
-        # using row indices as keys.
-        med_abs_dev = median_absolute_deviation(weight_matrix, outcome_indices, axis=1)
+        # get the MAD, the 1- and 2-norm and the summed activation of each row vector over the columns belonging to a
+        # given PoS tag, selecting those columns only once; store values in dictionaries using row indices as keys.
+        # The summed activation of each cue is averaged by the number of outcomes belonging to that PoS tag
+        med_abs_dev, norms1, norms2, alphas = vector_statistics(weight_matrix, outcome_indices, axis=1)
         pos_mad = store_dict(med_abs_dev)
-
-        # get the 1- and 2-norm value for each row vector over the columns belonging to a given PoS tag; store values in
-        # two dictionaries using row indices as keys.
-        norms1 = norm(weight_matrix, outcome_indices, axis=1)
         pos_norm1 = store_dict(norms1)
-        norms2 = norm(weight_matrix, outcome_indices, axis=1, p=2)
         pos_norm2 = store_dict(norms2)
-
-        # sum the total activation of each cue over all the outcomes belonging to a same PoS tag, then average it by
-        # the number of outcomes belonging to that PoS tag; store values in a dictionary using row indices as keys
-        category_avg_activations = activations(weight_matrix, outcome_indices, axis=1) / len(outcome_indices)
+        category_avg_activations = alphas / len(outcome_indices)
         pos_avg_act = store_dict(category_avg_activations)
 
         for fun in measures:
@@ -94,23 +92,19 @@ def cue_measures(weight_matrix, row_ids, col_ids, plots_folder):
             name = "_".join([fun, pos])
 
             # rank rows according to their value of fun computed over the words belonging to the current PoS tag
-            ranked = write_ranked_nodes(values, row_ids, plots_folder, name)
+            ranked = write_ranked_nodes(values, row_ids, plots_folder, name, reversed_ids=reversed_mapping)
 
             # plot values of each column against the rank of the column according to its  value
             scatter_path = os.path.join(plots_folder, ".".join(["_".join([name, 'scatter']), 'pdf']))
             plot_ranks(ranked, output_path=scatter_path, yname=fun,
                        xname='Rank', figname=fun)
 
-            # flip the row identifiers dictionary so that strings are keys and indices are values
-            # then map MAD/activation values to strings for a specific PoS tag
-            # finally create a key in the output dictionary for the PoS being considered, nested within a dictionary
+            # map MAD/activation values to strings for a specific PoS tag
+            # then create a key in the output dictionary for the PoS being considered, nested within a dictionary
             # specifying the function being computed,
             # finally store the dictionary with MAD/activation values as value of the PoS key under the function dict
-            reversed_mapping = dict(zip(row_ids.values(), row_ids.keys()))
-            pos_values = {}
-            for cue_id in values:
-                cue_string = reversed_mapping[cue_id]
-                pos_values[cue_string] = values[cue_id]
+            cue_ids = list(values.keys())
+            pos_values = dict(zip(reversed_mapping[cue_ids], values.values()))
             cue_values[fun][pos] = pos_values
 
     return cue_values
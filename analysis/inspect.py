@@ -3,13 +3,16 @@ __author__ = 'GCassani'
 """Function to analyze the cue-outcome association matrix learned from phonetic cues"""
 
 import os
-from time import strftime
+import logging
 from matrix.matrix import load
 from corpus.encode.utilities import encoding_features
 from analysis.measures import get_frequencies, get_cue_and_outcome_measures
 from analysis.corr import outcome_correlations, cue_correlations
 
 
+logger = logging.getLogger(__name__)
+
+
 def inspect_the_matrix(input_corpus, associations, celex_dir, plot_path,
                        uniphones, diphones, triphones, syllable, stress_marker):
 
@@ -35,18 +38,19 @@ def inspect_the_matrix(input_corpus, associations, celex_dir, plot_path,
     outcome_file = os.path.join(d, "outcomeFreqs.txt")
     cue_frequencies, outcome_frequencies = get_frequencies(input_corpus, cue_file, outcome_file)
 
-    # load the matrix of associations, get column and row indices
-    matrix, row_ids, col_ids = load(associations)
+    # get column and row indices of the matrix of associations; the matrix itself is passed as a path, so that the
+    # processes computing the different measures memory-map it instead of receiving a copy
+    _, row_ids, col_ids = load(associations)
 
-    cue_values, outcome_values, jaccard = get_cue_and_outcome_measures(matrix, row_ids, col_ids, celex_dir, plot_path,
-                                                                       uniphones, diphones, triphones,
+    cue_values, outcome_values, jaccard = get_cue_and_outcome_measures(associations, row_ids, col_ids, celex_dir,
+                                                                       plot_path, uniphones, diphones, triphones,
                                                                        syllable, stress_marker)
 
     outcome_values['jaccard'] = jaccard
     outcome_values['frequencies'] = outcome_frequencies
     cue_values['frequencies'] = cue_frequencies
 
-    print(": ".join([strftime("%Y-%m-%d %H:%M:%S"), "Finished computing statistics for cues and outcomes."]))
+    logger.info("Finished computing statistics for cues and outcomes.")
 
     cue_measures = ['MAD', 'activations', '1-norm', '2-norm', 'frequencies']
     cues = set(cue_frequencies.keys())
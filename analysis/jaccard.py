@@ -4,10 +4,12 @@ __author__ = 'GCassani'
    estimated with the ndl function given the test lexical item"""
 
 import os
+import heapq
 import operator
 import numpy as np
 from time import strftime
 from analysis.plot import plot_ranks
+from matrix.matrix import reverse_ids
 from corpus.encode.item import encode_item
 from celex.utilities.dictionaries import tokens2ids
 from corpus.encode.words.phonology import get_phonological_form
@@ -25,28 +27,19 @@ def get_top_active_cues(weight_matrix, column, n, reversed_cue_ids):
                                 indices selected from the specified column in the input NumPy array
     """
 
-    top_active_cues_ids = set()
-    top_active_cues = set()
+    column_activations = weight_matrix[:, column]
 
-    # sort all values in the relevant column in descending order, to get most active cues first
-    sorted_cue_activations = np.argsort(weight_matrix[:, column])[::-1]
+    # get the activation value of the n-th most active cue by partitioning the column around it, which only takes
+    # linear time, rather than sorting the whole column
+    n_th = len(column_activations) - min(max(n, 1), len(column_activations))
+    threshold = np.partition(column_activations, n_th)[n_th]
 
     # consider the n top active cues but keep adding cues if their activation values is the same as the n-th cue:
     # this has the purpose of avoiding that one cue out of many gets selected as the n-th out of other criteria
     # also make sure that cues have higher than 0 activations
-    for i in range(len(sorted_cue_activations)):
-        if weight_matrix[sorted_cue_activations[i], column] > 0:
-            if i < n:
-                top_active_cues_ids.add(sorted_cue_activations[i])
-            else:
-                if weight_matrix[sorted_cue_activations[i], column] == \
-                        weight_matrix[sorted_cue_activations[i - 1], column]:
-                    top_active_cues_ids.add(sorted_cue_activations[i])
-                else:
-                    break
-        else:
-            break
+    top_active_cues_ids = np.flatnonzero(np.logical_and(column_activations >= threshold, column_activations > 0))
 
+    top_active_cues = set()
     for identifier in top_active_cues_ids:
         try:
             top_active_cues.add(reversed_cue_ids[identifier])
@@ -59,8 +52,41 @@ def get_top_active_cues(weight_matrix, column, n, reversed_cue_ids):
 ########################################################################################################################
 
 
+def top_active_cues_mask(weight_matrix, columns, n):
+
+    """
+    :param weight_matrix:       a NumPy array, containing numerical values
+    :param columns:             a list of integers specifying which columns from the input array need to be considered
+    :param n:                   a list of integers, as long as columns, specifying how many elements (i.e. row indices)
+                                are considered from each of the columns
+    :return top_active_mask:    a boolean NumPy array with as many rows as the input array and as many columns as there
+                                are indices in columns, where True marks the top active cues of each column
+
+    The selection follows the same criteria as get_top_active_cues, but it is carried out on all columns at once: the n
+    top active cues are selected, together with all the cues whose activation is the same as the n-th cue, and only
+    cues with higher than 0 activations are considered.
+    """
+
+    # columns are gathered with np.take, which is several times faster than fancy indexing on a row-major matrix
+    sub_matrix = np.take(weight_matrix, columns, axis=1)
+
+    # get the activation value of the n-th most active cue in each column: columns are only partitioned around the
+    # distinct values of n rather than fully sorted, which keeps the selection linear in the number of rows
+    n_th = sub_matrix.shape[0] - np.clip(n, 1, sub_matrix.shape[0])
+    partitioned = np.partition(sub_matrix, np.unique(n_th), axis=0)
+    thresholds = partitioned[n_th, np.arange(sub_matrix.shape[1])]
+
+    top_active_mask = np.logical_and(sub_matrix >= thresholds, sub_matrix > 0)
+
+    return top_active_mask
+
+
+########################################################################################################################
+
+
 def jaccard(weight_matrix, cues2ids, outcomes2ids, celex_dict, plots_folder='',
-            stress_marker=True, uniphone=False, diphone=False, triphone=True, syllable=False, boundaries=True):
+            stress_marker=True, uniphone=False, diphone=False, triphone=True, syllable=False, boundaries=True,
+            top_k=None, reversed_cue_ids=None):
 
     """
     :param weight_matrix:           the matrix of cue-outcome association estimated using the ndl model
@@ -81,6 +107,10 @@ def jaccard(weight_matrix, cues2ids, outcomes2ids, celex_dict, plots_folder='',
     :param stress_marker:           a boolean indicating whether stress markers from the phonological representations of
                                     Celex need to be preserved or can be discarded
     :param boundaries:              a boolean specifying whether to consider or not word boundaries
+    :param top_k:                   an integer specifying how many outcomes with the highest Jaccard coefficient are
+                                    plotted and written to file. Default is None, meaning that all outcomes are ranked
+    :param reversed_cue_ids:        a NumPy array containing at each row index the corresponding cue string, as built
+                                    with reverse_ids from cues2ids. Default is None, meaning that it is built here
     :return jaccard_coefficients:   a dictionary mapping outcome surface forms (strings) to the Jaccard coefficient
                                     computed between the gold-standard and most active cues as estimated from the input
                                     matrix. Gold-standard cues are extracted from the outcome phonological form
@@ -101,14 +131,20 @@ def jaccard(weight_matrix, cues2ids, outcomes2ids, celex_dict, plots_folder='',
     jaccard_coefficients = {}
     true_cues = {}
     active_cues = {}
-    ids2cues = dict(zip(cues2ids.values(), cues2ids.keys()))
+    ids2cues = reverse_ids(cues2ids) if reversed_cue_ids is None else reversed_cue_ids
     total_items = len(outcomes2ids)
     check_points = {int(np.floor(total_items / 100 * n)): n for n in np.linspace(5, 100, 20)}
 
-    # consider each outcome separately
+    # encode each outcome in its gold-standard phonological cues, keeping track of the column of each outcome, of the
+    # rows of its gold-standard cues, and of how many top active cues need to be considered for it
+    encoded_outcomes = []
+    column_ids = []
+    gold_rows = []
+    gold_columns = []
+    n_gold = []
+    n_top = []
     for idx, outcome in enumerate(outcomes2ids):
 
-        column_id = outcomes2ids[outcome]
         wordform, pos = outcome.split('|')
         celex_entry = (wordform, pos, wordform)
         word_phon = get_phonological_form(celex_entry, celex_dict, token_indices)
@@ -120,44 +156,64 @@ def jaccard(weight_matrix, cues2ids, outcomes2ids, celex_dict, plots_folder='',
             # get the relevant phonological cues
             nphones = encode_item(word_phon, stress_marker=stress_marker, uniphones=uniphone,
                                   diphones=diphone, triphones=triphone, syllables=syllable)
+            gold_cues = set(nphones)
+            for cue in gold_cues:
+                if cue in cues2ids:
+                    gold_rows.append(cues2ids[cue])
+                    gold_columns.append(len(encoded_outcomes))
 
-            # get the top active phonological cues from the input association matrix given the outcome being considered
-            top_active_cues = get_top_active_cues(weight_matrix, column_id, len(nphones), ids2cues)
-
-            # compute the Jaccard coefficient and store correct and predicted cues for every outcome
-            set_inters = len(set.intersection(top_active_cues, set(nphones)))
-            set_union = len(set.union(top_active_cues, set(nphones)))
-            jaccard_coefficients[outcome] = set_inters / set_union
             true_cues[outcome] = nphones
-            active_cues[outcome] = top_active_cues
+            encoded_outcomes.append(outcome)
+            column_ids.append(outcomes2ids[outcome])
+            n_gold.append(len(gold_cues))
+            n_top.append(len(nphones))
 
         if idx+1 in check_points:
             print(strftime("%Y-%m-%d %H:%M:%S") +
                   ": %d%% of the outcomes have been processed to estimate the Jaccard coefficient."
                   % check_points[idx+1])
 
+    if encoded_outcomes:
+
+        # mark the top active cues of every encoded outcome in a boolean array with as many rows as there are cues and
+        # as many columns as there are encoded outcomes
+        top_mask = top_active_cues_mask(weight_matrix, column_ids, n_top)
+
+        # compute the Jaccard coefficient of all outcomes at once: the intersection only requires to look up the top
+        # active mask at the positions of the gold-standard cues, and to count hits per outcome; the union is then
+        # derived from the intersection as |A| + |B| - |A & B|, where the number of gold-standard cues also includes
+        # those missing from the matrix
+        hits = top_mask[gold_rows, gold_columns]
+        intersections = np.bincount(np.asarray(gold_columns, dtype=np.intp)[hits], minlength=len(encoded_outcomes))
+        unions = np.array(n_gold) + np.count_nonzero(top_mask, axis=0) - intersections
+        coefficients = intersections / unions
+
+        for col, outcome in enumerate(encoded_outcomes):
+            jaccard_coefficients[outcome] = coefficients[col]
+            active_cues[outcome] = set(ids2cues[np.flatnonzero(top_mask[:, col])])
+
     if plots_folder:
 
-        # check whether the provided folder path points to an existing folder,
-        # and create it if it doesn't already exist
-        if not os.path.isdir(plots_folder):
-            os.makedirs(plots_folder)
+        # create the provided folder if it doesn't already exist: exist_ok also covers the folder being created by
+        # another process in the meantime, e.g. when measures are computed in parallel
+        os.makedirs(plots_folder, exist_ok=True)
 
         ranked_path = os.path.join(plots_folder, '.'.join(["_".join([f_name, 'list']), 'txt']))
-        sorted_coeffs = sorted(jaccard_coefficients.items(), key=operator.itemgetter(1), reverse=True)
+        # when only the top k outcomes are needed, select them with a heap rather than sorting all outcomes
+        if top_k:
+            sorted_coeffs = heapq.nlargest(top_k, jaccard_coefficients.items(), key=operator.itemgetter(1))
+        else:
+            sorted_coeffs = sorted(jaccard_coefficients.items(), key=operator.itemgetter(1), reverse=True)
 
         scatter_path = os.path.join(plots_folder, ".".join(["_".join([f_name, 'scatter']), 'pdf']))
         plot_ranks(sorted_coeffs, output_path=scatter_path, yname='Jaccard coeff',
                    xname='Rank', figname='Jaccard coefficient for each outcome')
 
-        # write to file each outcome together with the correct and predicted phonological cues
-        with open(ranked_path, 'a+') as f_name:
-            for outcome in sorted_coeffs:
-                outcome = outcome[0]
-                jaccard_coeff = outcome[1]
-                true = true_cues[outcome]
-                top_active = active_cues[outcome]
-                f_name.write("\t".join([outcome, str(jaccard_coeff), str(true), str(top_active)]))
-                f_name.write("\n")
+        # write to file each outcome together with the correct and predicted phonological cues, opening the file once
+        # and writing all lines in a single call
+        with open(ranked_path, 'w') as ranked_file:
+            ranked_file.writelines("\t".join([outcome, str(jaccard_coeff),
+                                              str(true_cues[outcome]), str(active_cues[outcome])]) + "\n"
+                                   for outcome, jaccard_coeff in sorted_coeffs)
 
     return jaccard_coefficients
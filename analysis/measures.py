@@ -3,15 +3,40 @@ __author__ = 'GCassani'
 """Functions to compute and extract several measures from cue-outcome association matrices and learning trials"""
 
 import os
+import json
+import logging
 import operator
-from time import strftime
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from celex.get import get_celex_dictionary
+from matrix.matrix import reverse_ids
 from corpus.cues_outcomes import frequency
 from analysis.jaccard import jaccard
 from analysis.cues import cue_measures
 from analysis.outcomes import outcome_measures
 
 
+logger = logging.getLogger(__name__)
+
+
+def write_frequencies(frequencies, output_file):
+
+    """
+    :param frequencies:     a dictionary mapping strings to frequency counts
+    :param output_file:     the path to the file where strings and counts are written, one tab-separated pair per line,
+                            from the most to the least frequent string
+    """
+
+    # build the whole sorted table as a two-column array and let NumPy format and write it through a single buffered
+    # file handle
+    table = np.array(sorted(frequencies.items(), key=operator.itemgetter(1), reverse=True), dtype=object)
+    np.savetxt(output_file, table.reshape(-1, 2), fmt='%s', delimiter='\t')
+
+
+########################################################################################################################
+
+
 def get_frequencies(corpus, cue_file, outcome_file):
 
     """
@@ -21,24 +46,20 @@ def get_frequencies(corpus, cue_file, outcome_file):
     :return:
     """
 
-    # compute and store cue and outcome frequency counts
-    cue_freqs = frequency(corpus, 'cues')
-    outcome_freqs = frequency(corpus, 'outcomes')
+    # compute and store cue and outcome frequency counts, parsing the corpus only once for both
+    with open(corpus, 'r') as f:
+        corpus_content = json.load(f)
+    cue_freqs = frequency(corpus, 'cues', corpus=corpus_content)
+    outcome_freqs = frequency(corpus, 'outcomes', corpus=corpus_content)
+    del corpus_content
 
     if not os.path.exists(cue_file):
-        with open(cue_file, 'a+') as c_f:
-            for item in sorted(cue_freqs.items(), key=operator.itemgetter(1), reverse=True):
-                c_f.write("\t".join([item[0], str(item[1])]))
-                c_f.write("\n")
+        write_frequencies(cue_freqs, cue_file)
 
     if not os.path.exists(outcome_file):
-        with open(outcome_file, 'a+') as o_f:
-            for item in sorted(outcome_freqs.items(), key=operator.itemgetter(1), reverse=True):
-                o_f.write("\t".join([item[0], str(item[1])]))
-                o_f.write("\n")
+        write_frequencies(outcome_freqs, outcome_file)
 
-    print()
-    print(": ".join([strftime("%Y-%m-%d %H:%M:%S"), "Finished computing cue and outcome frequency counts."]))
+    logger.info("Finished computing cue and outcome frequency counts.")
 
     return cue_freqs, outcome_freqs
 
@@ -46,11 +67,30 @@ def get_frequencies(corpus, cue_file, outcome_file):
 ########################################################################################################################
 
 
+def _compute_measure(function, associations, *args, **kwargs):
+
+    """
+    :param function:        the function computing a measure, taking the association matrix as first argument
+    :param associations:    a NumPy array or the path to a .npy file containing it, which is then memory-mapped
+    :return:                the output of the function
+    """
+
+    if isinstance(associations, str):
+        associations = np.load(associations, mmap_mode='r', allow_pickle=False)
+
+    return function(associations, *args, **kwargs)
+
+
+########################################################################################################################
+
+
 def get_cue_and_outcome_measures(associations, row_ids, col_ids, celex_dir, plot_path,
-                                 uniphones, diphones, triphones, syllable, stress_marker, reduced=False):
+                                 uniphones, diphones, triphones, syllable, stress_marker, reduced=False, n_jobs=3):
 
     """
-    :param associations:
+    :param associations:    a NumPy array containing the cue-outcome associations or the path to the .npy file where it
+                            is stored: when a path is passed and measures are computed in parallel, each worker
+                            memory-maps the file rather than receiving a copy of the whole matrix
     :param row_ids:
     :param col_ids:
     :param celex_dir:
@@ -60,14 +100,41 @@ def get_cue_and_outcome_measures(associations, row_ids, col_ids, celex_dir, plot
     :param triphones:
     :param syllable:
     :param stress_marker:
+    :param reduced:
+    :param n_jobs:          the number of processes used to compute the Jaccard coefficients, outcome measures and cue
+                            measures, which are independent of each other. With 1 they are computed one after the other
     :return:
     """
 
     celex_dict = get_celex_dictionary(celex_dir, reduced)
-    jaccard_values = jaccard(associations, row_ids, col_ids, celex_dict, plots_folder=plot_path,
-                             stress_marker=stress_marker, uniphone=uniphones, diphone=diphones,
-                             triphone=triphones, syllable=syllable)
-    outcome_values = outcome_measures(associations, col_ids, plot_path)
-    cue_values = cue_measures(associations, row_ids, col_ids, plot_path)
+
+    # map row and column indices back to cue and outcome strings once for all the measures
+    reversed_row_ids = reverse_ids(row_ids)
+    reversed_col_ids = reverse_ids(col_ids)
+
+    jaccard_args = (jaccard, associations, row_ids, col_ids, celex_dict)
+    jaccard_kwargs = dict(plots_folder=plot_path, stress_marker=stress_marker, uniphone=uniphones,
+                          diphone=diphones, triphone=triphones, syllable=syllable, reversed_cue_ids=reversed_row_ids)
+    outcome_args = (outcome_measures, associations, col_ids, plot_path, reversed_col_ids)
+    cue_args = (cue_measures, associations, row_ids, col_ids, plot_path, reversed_row_ids)
+
+    # the folder shared by all measures is created once, before they are computed
+    os.makedirs(plot_path, exist_ok=True)
+
+    if n_jobs > 1:
+        # worker processes are spawned rather than forked: a child forked after Numba or other libraries started threads
+        # in this process can inherit locks held by those threads, and then hang when the interpreter shuts down
+        with ProcessPoolExecutor(max_workers=min(n_jobs, 3),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            jaccard_future = executor.submit(_compute_measure, *jaccard_args, **jaccard_kwargs)
+            outcome_future = executor.submit(_compute_measure, *outcome_args)
+            cue_future = executor.submit(_compute_measure, *cue_args)
+            jaccard_values = jaccard_future.result()
+            outcome_values = outcome_future.result()
+            cue_values = cue_future.result()
+    else:
+        jaccard_values = _compute_measure(*jaccard_args, **jaccard_kwargs)
+        outcome_values = _compute_measure(*outcome_args)
+        cue_values = _compute_measure(*cue_args)
 
     return cue_values, outcome_values, jaccard_values
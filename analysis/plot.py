@@ -7,6 +7,8 @@ import os
 import operator
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 
 def scatter(measures, summary, plot_path, name):
@@ -29,20 +31,27 @@ def scatter(measures, summary, plot_path, name):
             if id1 != id2 and (id1, id2, measure1, measure2) not in relevant_subplots:
                 relevant_subplots.append(subplot_id)
 
-    f_outcome_corr, axarr = plt.subplots(len(measures), len(measures))
+    # compute the extremes of every measure once, rather than for every subplot in which the measure appears
+    row_min = summary.min(axis=1)
+    row_max = summary.max(axis=1)
+
+    # draw on a figure that is not registered with pyplot, so that it is released as soon as it goes out of scope
+    # without importing any interactive backend
+    f_outcome_corr = Figure()
+    FigureCanvasAgg(f_outcome_corr)
+    axarr = f_outcome_corr.subplots(len(measures), len(measures), squeeze=False)
     f_outcome_corr.suptitle('Outcomes: correlations')
 
     for subplot in all_subplots:
         r, c, y_name, x_name = subplot
         if subplot in relevant_subplots:
-            x = summary[measures[x_name]]
-            y = summary[measures[y_name]]
-            axarr[r, c].scatter(x, y)
-            xlow = x.min() - x.min() / float(10)
-            xhigh = x.max() + x.max() / float(10)
+            x_id, y_id = measures[x_name], measures[y_name]
+            axarr[r, c].scatter(summary[x_id], summary[y_id])
+            xlow = row_min[x_id] - row_min[x_id] / float(10)
+            xhigh = row_max[x_id] + row_max[x_id] / float(10)
             axarr[r, c].set_xlim([xlow, xhigh])
-            ylow = y.min() - y.min() / float(10)
-            yhigh = y.max() + y.max() / float(10)
+            ylow = row_min[y_id] - row_min[y_id] / float(10)
+            yhigh = row_max[y_id] + row_max[y_id] / float(10)
             axarr[r, c].set_ylim([ylow, yhigh])
             if r == len(measures) - 1:
                 axarr[r, c].set_xlabel(x_name)
@@ -58,7 +67,6 @@ def scatter(measures, summary, plot_path, name):
             axarr[r, c].axis('off')
 
     f_outcome_corr.savefig(os.path.join(plot_path, name))
-    plt.close(f_outcome_corr)
 
 
 ########################################################################################################################
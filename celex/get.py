@@ -53,7 +53,7 @@ def print_celex_dict(celex_dict, outfile):
     :param outfile:     the path to a file where the information in the celex dictionary is written in .json format.
     """
 
-    with open(outfile, 'a+') as o_f:
+    with open(outfile, 'w') as o_f:
 
         json.dump(celex_dict, o_f)
 
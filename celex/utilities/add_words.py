@@ -41,6 +41,26 @@ def hardcode_words(celex_dict, token_surface, token_id, lemma_id, token_phonetic
 ########################################################################################################################
 
 
+def hardcode_words_bulk(celex_dict, rows):
+
+    """
+    :param celex_dict:      a dictionary created using the function initialize_celex_dict from this module. The
+                            dictionary can be empty or already contain items
+    :param rows:            an iterable of tuples, each containing the arguments of hardcode_words that follow
+                            celex_dict, in the same order (token_surface, token_id, lemma_id, token_phonetic, vowel,
+                            inflection, lemma_surface, lemma_phonetic, morph, pos)
+    :return celex_dict:     the dictionary updated with all the words to be hard-coded
+    """
+
+    for row in rows:
+        celex_dict = hardcode_words(celex_dict, *row)
+
+    return celex_dict
+
+
+########################################################################################################################
+
+
 def add_childes_words(celex_dict):
 
     """
@@ -49,55 +69,34 @@ def add_childes_words(celex_dict):
                         CHILDES transcripts
     """
 
-    celex_dict = hardcode_words(celex_dict, "will'nt", '1000000', '51924', "'wIl-Ht", 'I', 'X', "won't",
-                                "'w5nt", ['will', 'not'], 'V')
-    celex_dict = hardcode_words(celex_dict, "mhm", '1000001', '1000001', "em", '_', 'X', "non_ling",
-                                '_', ['non_ling'], 'C')
-    celex_dict = hardcode_words(celex_dict, "lego", '1000002', '1000002', "'l3-go", 'e', 'S', "lego",
-                                "'l3-go", ['lego'], 'N')
-    celex_dict = hardcode_words(celex_dict, "colour", '1000003', '8425', "'kV-l@R", 'V', 'S', "colour",
-                                "'kV-l@R", ['colour'], 'N')
-    celex_dict = hardcode_words(celex_dict, "color", '1000004', '8425', "'kV-l@R", 'V', 'S', "colour",
-                                "'kV-l@R", ['colour'], 'N')
-    celex_dict = hardcode_words(celex_dict, "horsie", '1000005', '21619', "h$s", '$', 'S', "horse",
-                                "'h$s", ['horse'], 'N')
-    celex_dict = hardcode_words(celex_dict, "ssh", '1000006', '1000001', "C", '_', 'X', "non-ling",
-                                '_', ['non-ling'], 'C')
-    celex_dict = hardcode_words(celex_dict, "byebye", '1000007', '5863', "b2-'b2", '2', 'X', "bye-bye",
-                                "b2-'b2", ['bye'], 'C')
-    celex_dict = hardcode_words(celex_dict, "shooter", '1000008', '1000003', "'Su-t@R", 'u', 'S', "shooter",
-                                "'Su-t@R", ['shoot', 'er'], 'N')
-    celex_dict = hardcode_words(celex_dict, "mousie", '1000009', '29286', "'m2-sI", '2', 'S', "mouse",
-                                "'m6s", ['mouse', 'y'], 'N')
-    celex_dict = hardcode_words(celex_dict, "mummie", '1000010', '29460', "'mV-mI", 'V', 'S', "mummy",
-                                "'mV-mI", ['mum', 'y'], 'N')
-    celex_dict = hardcode_words(celex_dict, "favorite", '1000011', '16271', "'f1-vrIt", '1', 'b', "favourite",
-                                "'f1-v@-rIt", ['favour', 'ite'], 'A')
-    celex_dict = hardcode_words(celex_dict, "upside", '1000012', '1000004', "Vp-'s2d", '2', 'b', "upside",
-                                "Vp-'s2d", ['upside'], 'B')
-    celex_dict = hardcode_words(celex_dict, "carwash", '1000013', '1000005', "'k#R-wQS", '#', 'S', "carwash",
-                                "'k#R-wQS", ['car', 'wash'], 'N')
-    celex_dict = hardcode_words(celex_dict, "anymore", '1000014', '1000006', "E-nI-'m$R", '$', 'X', "anymore",
-                                "E-nI-'m$R", ['any', 'more'], 'B')
-    celex_dict = hardcode_words(celex_dict, "whee", '1000015', '1000001', "wee", '_', 'X', "non-ling",
-                                '_', ['non-ling'], 'C')
-    celex_dict = hardcode_words(celex_dict, "carpark", '1000016', '1000007', "k#R-'p#k", '#', 'S', "carpark",
-                                "k#R-'p#k", ['car', 'park'], 'N')
-    celex_dict = hardcode_words(celex_dict, "lawnmower", '1000017', '1000008', "'l$n-m5-er", '$', 'S', "lawnmower",
-                                "'l$n-m5-er", ['lawn', 'mow', 'er'], 'N')
-    celex_dict = hardcode_words(celex_dict, "whoo", '1000018', '1000001', "hU", '_', 'X', "non-ling",
-                                '_', ['non-ling'], 'C')
-    celex_dict = hardcode_words(celex_dict, "doggie", '1000019', '13205', "'dQ-gI", 'Q', 'S', "doggy",
-                                "'dQ-gI", ['dog', 'y'], 'N')
-    celex_dict = hardcode_words(celex_dict, "hotdog", '1000020', '21690', "hQt-'dQg", 'Q', 'S', "hot dog",
-                                "hQt-'dQg", ['hot', 'dog'], 'N')
-    celex_dict = hardcode_words(celex_dict, "christmas", '1000021', '7479', "'krIs-m@s", 'I', 'X', "christmas",
-                                "'krIs-m@s", ['christ', 'mas'], 'N')
-    celex_dict = hardcode_words(celex_dict, "traveling", '1000022', '48164', "'tr{v-lIN", '{', 'pe', "travel",
-                                "'tr{-vP", ['travel'], 'V')
-    celex_dict = hardcode_words(celex_dict, "snowplow", '1000023', '43060', "'snO-pl8", 'O', 'X', "snowplough",
-                                "'sn5-pl6", ['snow', 'plough'], 'N')
-    celex_dict = hardcode_words(celex_dict, "colors", '1000024', '8425', "'kV-l@Rs", 'V', 'P', "colour",
-                                "'kV-l@R", ['colour'], 'N')
+    childes_words = (
+        ("will'nt", '1000000', '51924', "'wIl-Ht", 'I', 'X', "won't", "'w5nt", ['will', 'not'], 'V'),
+        ("mhm", '1000001', '1000001', "em", '_', 'X', "non_ling", '_', ['non_ling'], 'C'),
+        ("lego", '1000002', '1000002', "'l3-go", 'e', 'S', "lego", "'l3-go", ['lego'], 'N'),
+        ("colour", '1000003', '8425', "'kV-l@R", 'V', 'S', "colour", "'kV-l@R", ['colour'], 'N'),
+        ("color", '1000004', '8425', "'kV-l@R", 'V', 'S', "colour", "'kV-l@R", ['colour'], 'N'),
+        ("horsie", '1000005', '21619', "h$s", '$', 'S', "horse", "'h$s", ['horse'], 'N'),
+        ("ssh", '1000006', '1000001', "C", '_', 'X', "non-ling", '_', ['non-ling'], 'C'),
+        ("byebye", '1000007', '5863', "b2-'b2", '2', 'X', "bye-bye", "b2-'b2", ['bye'], 'C'),
+        ("shooter", '1000008', '1000003', "'Su-t@R", 'u', 'S', "shooter", "'Su-t@R", ['shoot', 'er'], 'N'),
+        ("mousie", '1000009', '29286', "'m2-sI", '2', 'S', "mouse", "'m6s", ['mouse', 'y'], 'N'),
+        ("mummie", '1000010', '29460', "'mV-mI", 'V', 'S', "mummy", "'mV-mI", ['mum', 'y'], 'N'),
+        ("favorite", '1000011', '16271', "'f1-vrIt", '1', 'b', "favourite", "'f1-v@-rIt", ['favour', 'ite'], 'A'),
+        ("upside", '1000012', '1000004', "Vp-'s2d", '2', 'b', "upside", "Vp-'s2d", ['upside'], 'B'),
+        ("carwash", '1000013', '1000005', "'k#R-wQS", '#', 'S', "carwash", "'k#R-wQS", ['car', 'wash'], 'N'),
+        ("anymore", '1000014', '1000006', "E-nI-'m$R", '$', 'X', "anymore", "E-nI-'m$R", ['any', 'more'], 'B'),
+        ("whee", '1000015', '1000001', "wee", '_', 'X', "non-ling", '_', ['non-ling'], 'C'),
+        ("carpark", '1000016', '1000007', "k#R-'p#k", '#', 'S', "carpark", "k#R-'p#k", ['car', 'park'], 'N'),
+        ("lawnmower", '1000017', '1000008', "'l$n-m5-er", '$', 'S', "lawnmower", "'l$n-m5-er",
+         ['lawn', 'mow', 'er'], 'N'),
+        ("whoo", '1000018', '1000001', "hU", '_', 'X', "non-ling", '_', ['non-ling'], 'C'),
+        ("doggie", '1000019', '13205', "'dQ-gI", 'Q', 'S', "doggy", "'dQ-gI", ['dog', 'y'], 'N'),
+        ("hotdog", '1000020', '21690', "hQt-'dQg", 'Q', 'S', "hot dog", "hQt-'dQg", ['hot', 'dog'], 'N'),
+        ("christmas", '1000021', '7479', "'krIs-m@s", 'I', 'X', "christmas", "'krIs-m@s", ['christ', 'mas'], 'N'),
+        ("traveling", '1000022', '48164', "'tr{v-lIN", '{', 'pe', "travel", "'tr{-vP", ['travel'], 'V'),
+        ("snowplow", '1000023', '43060', "'snO-pl8", 'O', 'X', "snowplough", "'sn5-pl6", ['snow', 'plough'], 'N'),
+        ("colors", '1000024', '8425', "'kV-l@Rs", 'V', 'P', "colour", "'kV-l@R", ['colour'], 'N'),
+    )
+    celex_dict = hardcode_words_bulk(celex_dict, childes_words)
 
     return celex_dict
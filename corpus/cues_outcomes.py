@@ -3,10 +3,12 @@ __author__ = 'GCassani'
 """Function to collect cues and outcomes in a corpus and their frequency counts"""
 
 import json
+import numpy as np
+from itertools import chain
 from collections import Counter
 
 
-def get_cues_and_outcomes(input_file):
+def get_cues_and_outcomes(input_file, corpus=None):
 
     """
     :param input_file:      a string indicating the path to the corpus to be considered: it is assumed to be a .json
@@ -14,20 +16,18 @@ def get_cues_and_outcomes(input_file):
                             consistuent phonetic cues, the second encodes the same learning events into their meaning
                             units. Each learning event is a list nested in the two main lists.
                             outcomes; each of the two may consists of multiple, comma-separated strings
+    :param corpus:          the content of the input file, if it has already been loaded, so that it is not parsed
+                            again. Default is None, meaning that the input file is read
     :return cue2ids:        a dictionary mapping each of the strings found in the cues fields to a numerical index
     :return outcome2ids:    a dictionary mapping each of the strings found in the outcomes fields to a numerical index
     """
 
-    outcomes = set()
-    cues = set()
+    if corpus is None:
+        with open(input_file, 'r') as f:
+            corpus = json.load(f)
 
-    corpus = json.load(open(input_file, 'r+'))
-
-    for i in range(len(corpus[0])):
-        trial_cues = set(corpus[0][i])
-        cues.update(trial_cues)
-        trial_outcomes = set(corpus[1][i])
-        outcomes.update(trial_outcomes)
+    cues = set(chain.from_iterable(corpus[0]))
+    outcomes = set(chain.from_iterable(corpus[1]))
 
     cues2ids = {k: idx for idx, k in enumerate(sorted(cues))}
     outcomes2ids = {k: idx for idx, k in enumerate(sorted(outcomes))}
@@ -38,7 +38,7 @@ def get_cues_and_outcomes(input_file):
 ########################################################################################################################
 
 
-def frequency(corpus_file, target):
+def frequency(corpus_file, target, corpus=None):
 
     """
     :param corpus_file:     a string specifying the path to the corpus to be used as input: the file is assumed to be a
@@ -46,26 +46,57 @@ def frequency(corpus_file, target):
                             outcomes. Each list consists of lists, one for each learning event.
     :param target:          a string specifying whether a frequency list should be derived for cues ('cues') or outcomes
                             ('outcomes'); any other value will give an error.
+    :param corpus:          the content of the corpus file, if it has already been loaded, so that it is not parsed
+                            again. Default is None, meaning that the corpus file is read
     :return frequencies:    a dictionary where strings (cues or outcomes) are used as keys and the number of utterances
                             they occur in as values (it slightly differs from raw frequency counts because even if a cue
                             or outcome occurs more than once in a sentence, its frequency count is only updated once
     """
 
-    corpus = json.load(open(corpus_file, 'r+'))
-
-    frequencies = Counter()
+    if target == 'cues':
+        layer = 0
+    elif target == 'outcomes':
+        layer = 1
+    else:
+        raise ValueError("Please specify the target items to be counted: either 'cues' or 'outcomes'.")
 
-    for i in range(len(corpus[0])):
+    if corpus is None:
+        with open(corpus_file, 'r') as f:
+            corpus = json.load(f)
 
-        if target == 'cues':
-            cues = set(corpus[0][i])
-            for target_cue in cues:
-                frequencies[target_cue] += 1
-        elif target == 'outcomes':
-            outcomes = set(corpus[1][i])
-            for target_outcome in outcomes:
-                frequencies[target_outcome] += 1
-        else:
-            ValueError("Please specify the target items to be counted: either 'cues' or 'outcomes'.")
+    # deduplicate items within each learning event, then count all items from all learning events in a single call to
+    # the Counter constructor, whose counting loop runs in C
+    frequencies = Counter(chain.from_iterable(map(set, corpus[layer])))
 
     return frequencies
+
+
+########################################################################################################################
+
+
+def trials_to_ids(trials, items2ids, unique=False):
+
+    """
+    :param trials:          a list of lists of strings, one for each learning event (i.e. either the cue or the outcome
+                            layer of a corpus)
+    :param items2ids:       a dictionary mapping each string in the learning events to a numerical index
+    :param unique:          a boolean specifying whether to keep each string only once per learning event
+    :return indptr:         a NumPy array with as many elements as there are learning events plus one: the indices of
+                            the i-th learning event are found between positions indptr[i] and indptr[i+1] in indices
+    :return indices:        a NumPy array containing the indices of the strings in all learning events, one event after
+                            the other
+
+    The learning events are encoded in the compressed sparse row (CSR) format, so that strings are mapped to indices
+    once for the whole corpus, and the indices of each learning event can then be taken as a slice (a view) of a
+    single array.
+    """
+
+    if unique:
+        trials = [set(trial) for trial in trials]
+
+    lengths = np.fromiter(map(len, trials), dtype=np.int64, count=len(trials))
+    indptr = np.zeros(len(trials) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter((items2ids[item] for item in chain.from_iterable(trials)), dtype=np.int32, count=indptr[-1])
+
+    return indptr, indices
@@ -39,11 +39,14 @@ def encode_corpus(corpus_name, celex_dict, tokens2identifiers, pos_dict,
     # utterance itself
     corpus = json.load(open(corpus_name, 'r+'))
     total = len(corpus[0])
-    check_points = {np.floor(total / float(100) * n): n for n in np.linspace(5, 100, 20)}
+    check_points = {int(np.floor(total / float(100) * n)): n for n in np.linspace(5, 100, 20)}
 
     encoded_corpus = [[], []]
     missed = 0
 
+    # the table used to delete quotes from phonological representations is the same for all utterances
+    quotes_table = str.maketrans(dict.fromkeys('"'))
+
     # for every utterance in the input corpus, remove words with a PoS tag that doesn't belong to the
     # dictionary of PoS mappings; then map valid words to the right PoS tag as indicated by the PoS dictionary
     for i in range(len(corpus[0])):
@@ -66,8 +69,7 @@ def encode_corpus(corpus_name, celex_dict, tokens2identifiers, pos_dict,
             if isinstance(phonological_representations, list):
 
                 utterance = concatenate_phonological_representations(phonological_representations)
-                table = str.maketrans(dict.fromkeys('"'))
-                utterance = utterance.translate(table)
+                utterance = utterance.translate(quotes_table)
 
                 n_phones = encode_item(utterance, stress_marker=stress_marker, boundaries=boundaries,
                                        uniphones=uniphones, diphones=diphones, triphones=triphones, syllables=syllables)
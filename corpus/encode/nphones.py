@@ -2,6 +2,62 @@ __author__ = 'GCassani'
 
 """Function to encode a Celex phonological representations into its constituents n-phones"""
 
+import numpy as np
+
+# Numba is optional: when it is available, n-phones containing stress markers are located by a compiled loop
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _nphone_bounds(symbols, n, stress_marker):
+
+    """
+    :param symbols:         an indexable sequence of symbols, either the phonological representation itself or a NumPy
+                            array with the code point of each of its characters
+    :param n:               the number of phonemes in each n-phone
+    :param stress_marker:   the stress marker, as found in symbols (the character itself or its code point)
+    :return starts:         a NumPy array with the position in symbols where each n-phone starts
+    :return ends:           a NumPy array with the position in symbols where each n-phone ends (excluded)
+
+    N-phones are formed by picking every phoneme and combining it with as many following phonemes as specified by n.
+    The stress marker is not considered as a phoneme but as something that modifies the stressed vowel and is part of
+    it, so an n-phone containing it is one symbol longer, e.g. +d'og+ is encoded as ["+d", "d'o", "'og", "g+"] in
+    diphones. When an n-phone starts with the stress marker, the next symbol is skipped, so that n-phones that only
+    differ in the presence of the stress marker at the beginning, e.g. 'US and US, are not both stored; n-phones are
+    collected until there are not enough phonemes left to form one.
+    """
+
+    size = len(symbols)
+    starts = np.empty(size, dtype=np.int64)
+    ends = np.empty(size, dtype=np.int64)
+    count = 0
+
+    i = 0
+    while i < size:
+        j = i
+        phonemes = 0
+        while j < size and phonemes < n:
+            if symbols[j] != stress_marker:
+                phonemes += 1
+            j += 1
+        if phonemes < n:
+            break
+        starts[count] = i
+        ends[count] = j
+        count += 1
+        i += 2 if symbols[i] == stress_marker else 1
+
+    return starts[:count], ends[:count]
+
+
+if njit is not None:
+    _nphone_bounds = njit(cache=True)(_nphone_bounds)
+
+
+########################################################################################################################
+
 
 def get_nphones(phon_repr, n):
 
@@ -14,56 +70,18 @@ def get_nphones(phon_repr, n):
                         input string
     """
 
-    nphones = list()
+    # without stress markers, every symbol is a phoneme and n-phones are all the substrings of length n
+    if "'" not in phon_repr:
+        return [phon_repr[i:i + n] for i in range(len(phon_repr) - n + 1)]
 
-    # if the granularity is higher, build n-phones and store them in a list
-    # - len(utterance) - (n - 1) ensures you don't try to make an n-phone from the last character of the string (in the
-    #   case of diphones), since there are no symbols after it (or from the second-to last in the case of triphones)
-    # - n-phones are formed by picking every phoneme from the first and combining it with as many following phonemes as
-    #   specified by the parameter n
-    # - if stress needs to preserved, specified through the input parameter, then the stress marker (') is added to all
-    #   nphones containing a stressed vowel, but the marker itself doesn't count as a symbol, so a diphone containing a
-    #   stressed vowel actually contains 3 symbols, the two phonemes and the stress marker itself
-
-    i = 0
+    # if stress needs to be preserved, the stress marker (') is added to all n-phones containing a stressed vowel, but
+    # the marker itself doesn't count as a symbol, so a diphone containing a stressed vowel actually contains 3 symbols;
+    # the boundaries of all n-phones are found by a compiled loop over the code points of the string when Numba is
+    # available, and by the same loop over the string itself otherwise, then n-phones are sliced from the string
+    if njit is None:
+        starts, ends = _nphone_bounds(phon_repr, n, "'")
+    else:
+        codes = np.frombuffer(phon_repr.encode('utf-32-le'), dtype=np.uint32)
+        starts, ends = _nphone_bounds(codes, n, ord("'"))
 
-    # loop through the input string considering every index except the last one
-    while i < len(phon_repr):
-        # initialize an empty string to build the nphone and a second index; then create a second variable indicating
-        # the n-phone length that can be extended if the stress marker is found - the stress marker is not considered as
-        # a phoneme but as something that modifies the stressed vowel and is part of it, e.g. +d'og+ is encoded as
-        # ["+d", "d'o", "'og", "g+"] in diphones. The stress marker, though, makes "d'o" found in dog from "do" found in
-        # "condo', where the o doesn't bear any stress
-        nphone = ''
-        j = 0
-        flex_n = n
-        while j < flex_n:
-            try:
-                nphone += phon_repr[i + j]
-                # if the n-phone contains the stress marker, allow it to include a further character
-                if phon_repr[i + j] == "'":
-                    flex_n += 1
-                j += 1
-            except IndexError:
-                i = len(phon_repr) + 1
-                j = flex_n + 2
-
-        if len(nphone) >= n:
-            nphones.append(nphone)
-
-        if i < len(phon_repr):
-            # if the current symbol being processed is the stress marker, jump ahead of two symbols: this prevents the
-            # function from storing two n-phones that only differ in the presence of the stress marker at the beginning,
-            # e.g. 'US and US. US is the unstressed version of 'US and it is wrong to store them both, since only one
-            # occurs
-            if phon_repr[i] == "'":
-                i += 2
-            else:
-                i += 1
-
-    # make sure that no nphone of the wrong granularity was created by getting the stress marker wrong
-    for nphone in nphones:
-        table = str.maketrans(dict.fromkeys("'"))
-        if len(nphone.translate(table)) < n:
-            nphones.remove(nphone)
-    return nphones
+    return [phon_repr[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
@@ -4,6 +4,7 @@ __author__ = 'GCassani'
    (can be called from command line)"""
 
 import os
+import logging
 import argparse
 from analysis.inspect import inspect_the_matrix
 
@@ -70,6 +71,9 @@ def main():
     args = parser.parse_args()
     check_input_arguments(args, parser)
 
+    # progress messages from the analysis modules are timestamped once by the logging formatter
+    logging.basicConfig(format="%(asctime)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+
     # compute pairwise correlations between frequency, MAD, activation, and Jaccard coefficients for the outcomes
     # in the input corpus, then print them to standard output
 
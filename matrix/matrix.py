@@ -4,14 +4,43 @@ __author__ = 'GCassani'
 
 import os
 import json
-import operator
+import functools
 import numpy as np
 
 
-def load(filename):
+@functools.lru_cache(maxsize=8)
+def _load_ids(folder, timestamp):
+
+    """
+    :param folder:          a string indicating the path to the folder containing the files cueIDs.json and
+                            outcomeIDs.json
+    :param timestamp:       the latest modification time of the two files, used as part of the cache key so that files
+                            written anew in the same folder are parsed again
+    :return cue_ids:        a dictionary mapping strings to row indices
+    :return outcome_ids:    a dictionary mapping strings to column indices
+
+    Results are cached per folder, so that the JSON files are parsed only once when several matrices from the same
+    folder are loaded one after the other (e.g. matrices stored at different time points in a longitudinal design).
+    """
+
+    with open(os.path.join(folder, "cueIDs.json"), "r") as cue_file:
+        cue_ids = json.load(cue_file)
+    with open(os.path.join(folder, "outcomeIDs.json"), "r") as outcome_file:
+        outcome_ids = json.load(outcome_file)
+
+    return cue_ids, outcome_ids
+
+
+########################################################################################################################
+
+
+def load(filename, mmap_mode='r'):
 
     """
     :param filename:        a string indicating the path to a .npy file containing a NumPy array
+    :param mmap_mode:       the memory-map mode passed to np.load: the default 'r' maps the file read-only, so that only
+                            the rows and columns that are actually accessed are read from disk. Use 'r+' or 'c' if the
+                            matrix needs to be modified, or None to read the whole matrix into memory
     :return weight_matrix:  the NumPy array loaded from the input file
     :return cue_ids:        a dictionary mapping strings to row indices: the data are loaded automatically and the
                             dictionary has as many entries as there are rows in the weight_matrix
@@ -19,13 +48,13 @@ def load(filename):
                             dictionary has as many entries as there are columns in the weight_matrix
     """
 
-    d = os.path.dirname(filename)
-    cue_file = os.path.join(d, "cueIDs.json")
-    outcome_file = os.path.join(d, "outcomeIDs.json")
-
-    cue_ids = json.load(open(cue_file, "r"))
-    outcome_ids = json.load(open(outcome_file, "r"))
-    weight_matrix = np.load(filename)
+    d = os.path.abspath(os.path.dirname(filename))
+    timestamp = max(os.path.getmtime(os.path.join(d, "cueIDs.json")),
+                    os.path.getmtime(os.path.join(d, "outcomeIDs.json")))
+    cue_ids, outcome_ids = _load_ids(d, timestamp)
+    # the cached dictionaries are copied, so that callers can modify them without affecting later calls
+    cue_ids, outcome_ids = dict(cue_ids), dict(outcome_ids)
+    weight_matrix = np.load(filename, mmap_mode=mmap_mode, allow_pickle=False)
 
     return weight_matrix, cue_ids, outcome_ids
 
@@ -33,12 +62,33 @@ def load(filename):
 ########################################################################################################################
 
 
+def reverse_ids(ids):
+
+    """
+    :param ids:         a dictionary mapping strings to row or column indices of a matrix
+    :return strings:    a NumPy array of objects, containing at each index the string mapped to that index in the input
+                        dictionary
+
+    Build the reversed mapping once, so that functions can retrieve strings from indices by indexing an array rather
+    than reversing the dictionary every time they are called.
+    """
+
+    strings = np.empty(max(ids.values()) + 1 if ids else 0, dtype=object)
+    strings[list(ids.values())] = list(ids.keys())
+
+    return strings
+
+
+########################################################################################################################
+
+
 def rearrange(matrix, f, axis='r', reverse=False):
 
     """
     :param matrix:      a numpy array containing numerical values
     :param f:           a function operating on numerical values whose outcome is used to rearrange the desired matrix
-                        dimensions
+                        dimensions: it should return a NumPy array with one value per row or column, but a dictionary
+                        mapping row or column indices to values is also accepted
     :param axis:        a string specifying whether rows ('r') or columns ('c') are to be rearranged; any other value
                         will cause an error.
     :param reverse:     a boolean specifying whether to sort in ascending (False) or descending (True) order - default
@@ -47,16 +97,18 @@ def rearrange(matrix, f, axis='r', reverse=False):
                         rearranged according to the output of the specified function in the desired order
     """
 
+    if axis not in {'r', 'c'}:
+        raise ValueError("Please specify the axis on which marginals are computed: either 'r' or 'c'.")
+
     outcome = f(matrix, axis=axis)
+    if isinstance(outcome, dict):
+        outcome = np.fromiter((outcome[i] for i in range(len(outcome))), dtype=np.float64, count=len(outcome))
 
-    sorted_ids = [i[0] for i in sorted(outcome.items(), key=operator.itemgetter(1), reverse=reverse)]
+    # a stable sort on the negated values keeps tied rows or columns in their original order also when sorting in
+    # descending order
+    sorted_ids = np.argsort(-outcome if reverse else outcome, kind='stable')
 
-    if axis == 'r':
-        matrix = matrix[sorted_ids, :]
-    elif axis == 'c':
-        matrix = matrix[:, sorted_ids]
-    else:
-        ValueError("Please specify the axis on which marginals are computed: either 'r' or 'c'.")
+    matrix = matrix.take(sorted_ids, axis=0 if axis == 'r' else 1)
 
     return matrix
 
@@ -64,29 +116,60 @@ def rearrange(matrix, f, axis='r', reverse=False):
 ########################################################################################################################
 
 
-def group_outcomes(matrix, outcomes2ids):
+def pos_permutation(outcomes2ids):
 
     """
-    :param matrix:          a NumPy 2d array
-    :param outcomes2ids:    a dictionary mapping strings to column indices of the input matrix. Each string consists of
-                            a word and a part of speech tag separated by a pipe symbol ('|')
-    :return: sorted_matrix: the input matrix, with columns regrouped so that words from a same pos tag are net to each
-                            other
-    :return outcomes2ids:   a dictionary mapping outcomes from the input dictionary to the corresponding columns of the
-                            output matrix
+    :param outcomes2ids:    a dictionary mapping strings to column indices of a matrix. Each string consists of a word
+                            and a part of speech tag separated by a pipe symbol ('|')
+    :return permutation:    a NumPy array of column indices, ordered so that columns of words from a same pos tag are
+                            next to each other
+    :return outcomes2ids:   a dictionary mapping outcomes from the input dictionary to their position in the permutation
     """
 
     # sort outcomes according to their PoS
     sorted_by_pos = sorted(outcomes2ids.items(), key=lambda tup: tup[0].split('|')[1])
     # get the column indices of the outcomes keeping the new order
-    sorted_indices = [ii for outcome, ii in sorted_by_pos]
-    # reorder the columns in the input matrix using the sorted indices: the column corresponding to the first index
-    # will be the first of the sorted_matrix
-    sorted_matrix = matrix[:, sorted_indices]
+    permutation = np.array([ii for outcome, ii in sorted_by_pos], dtype=np.intp)
     # map outcomes to their new column indices, since the outcome at the first column in the original matrix does not
     # point to the first matrix anymore
     outcomes2ids = {}
     for idx, outcome in enumerate(sorted_by_pos):
         outcomes2ids[outcome[0]] = idx
 
+    return permutation, outcomes2ids
+
+
+########################################################################################################################
+
+
+def group_outcomes(matrix, outcomes2ids, out=None):
+
+    """
+    :param matrix:          a NumPy 2d array
+    :param outcomes2ids:    a dictionary mapping strings to column indices of the input matrix. Each string consists of
+                            a word and a part of speech tag separated by a pipe symbol ('|')
+    :param out:             a NumPy 2d array with as many rows as the input matrix and as many columns as there are
+                            outcomes in the input dictionary, where the regrouped columns are written: pass it to reuse
+                            the same memory across calls. Default is None, meaning that a new array is allocated
+    :return: sorted_matrix: the input matrix, with columns regrouped so that words from a same pos tag are net to each
+                            other
+    :return outcomes2ids:   a dictionary mapping outcomes from the input dictionary to the corresponding columns of the
+                            output matrix
+
+    Callers that only need to read some of the regrouped columns can use pos_permutation and index the input matrix
+    lazily, avoiding to copy it altogether.
+    """
+
+    permutation, outcomes2ids = pos_permutation(outcomes2ids)
+
+    # if the columns are already grouped and contiguous, a slice of the input matrix is returned, which is a view and
+    # does not copy any data; otherwise, reorder the columns in the input matrix using the sorted indices: the column
+    # corresponding to the first index will be the first of the sorted_matrix
+    first = permutation[0] if permutation.size else 0
+    contiguous = np.array_equal(permutation, np.arange(first, first + permutation.size))
+    if out is None and contiguous:
+        sorted_matrix = matrix[:, first:first + permutation.size]
+    else:
+        sorted_matrix = np.take(matrix, permutation, axis=1, out=out)
+
     return sorted_matrix, outcomes2ids
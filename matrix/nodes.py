@@ -4,19 +4,24 @@ __author__ = 'GCassani'
    sorting them according to a given measure, such as frequency, entropy, activation, or MAD"""
 
 import os
-import operator
+import csv
+import numpy as np
 
 
-def rank_nodes(dict1, dict2, filter_vec=None):
+def rank_nodes(dict1, dict2, filter_vec=None, reversed_mapping=None):
 
     """
-    :param dict1:       a python dictionary
-    :param dict2:       a python dictionary whose values are used to access keys from dict1
-    :param filter_vec:  default None, meaning that all keys from the argument mapping are evaluated.
-                        If an iterable is passed, this must contain items that are also values of the mapping
-                        dictionary (the requirement that its values are also keys of the nodes dictionary always holds)
-    :return ranked:     a Python dictionary whose keys are the keys from dict2 and whose values are the values from
-                        dict1. This dictionary is ranked according to the values.
+    :param dict1:               a python dictionary
+    :param dict2:               a python dictionary whose values are used to access keys from dict1
+    :param filter_vec:          default None, meaning that all keys from the argument mapping are evaluated.
+                                If an iterable is passed, this must contain items that are also values of the mapping
+                                dictionary (the requirement that its values are also keys of the nodes dictionary
+                                always holds)
+    :param reversed_mapping:    default None, meaning that dict2 is reversed here. Otherwise, a dictionary or NumPy
+                                array mapping the values of dict2 to their keys, e.g. as built by reverse_ids, which
+                                spares reversing the same mapping again when many measures are ranked
+    :return ranked:             a Python dictionary whose keys are the keys from dict2 and whose values are the values
+                                from dict1. This dictionary is ranked according to the values.
 
     EXAMPLE:
     dict1 contains numerical indices as keys mapping to entropy values.
@@ -28,20 +33,18 @@ def rank_nodes(dict1, dict2, filter_vec=None):
     if no filter is passed then all indices are evaluated.
     """
 
-    ranked = {}
+    if reversed_mapping is None:
+        reversed_mapping = dict(zip(dict2.values(), dict2.keys()))
 
-    reversed_mapping = dict(zip(dict2.values(), dict2.keys()))
+    # gather names and values in two aligned arrays, evaluating each index once, and rank them with a stable sort on the
+    # negated values, which preserves the original order of tied nodes as sorting the items in reverse order did; the
+    # values are only cast to double precision to be sorted, and are returned as they are found in dict1
+    keys = list(dict.fromkeys(filter_vec)) if filter_vec else list(dict1.keys())
+    names = np.array([reversed_mapping[k] for k in keys], dtype=object)
+    values = np.array([dict1[k] for k in keys], dtype=object)
+    order = np.argsort(-values.astype(np.float64), kind='stable')
 
-    if filter_vec:
-        for k in filter_vec:
-            name = reversed_mapping[k]
-            ranked[name] = dict1[k]
-    else:
-        for k in dict1:
-            name = reversed_mapping[k]
-            ranked[name] = dict1[k]
-
-    ranked = sorted(ranked.items(), key=operator.itemgetter(1), reverse=True)
+    ranked = list(zip(names[order].tolist(), values[order].tolist()))
 
     return ranked
 
@@ -49,7 +52,7 @@ def rank_nodes(dict1, dict2, filter_vec=None):
 ########################################################################################################################
 
 
-def write_ranked_nodes(values, ids, plots_folder, name):
+def write_ranked_nodes(values, ids, plots_folder, name, reversed_ids=None):
 
     """
     :param values:          a dictionary mapping numerical indices to numerical values
@@ -57,6 +60,8 @@ def write_ranked_nodes(values, ids, plots_folder, name):
     :param plots_folder:    a string indicating the path to a folder
     :param name:            a string indicating the name of the function used to generate the numerical values in the
                             values dictionary
+    :param reversed_ids:    default None. Otherwise, a dictionary or NumPy array mapping numerical indices back to the
+                            strings in the ids dictionary, passed on to rank_nodes
     :return ranked:         a Python dictionary whose keys are strings from the ids dictionary and whose values are the
                             values from the values dictionary. This dictionary is ranked according to the values.
 
@@ -64,11 +69,12 @@ def write_ranked_nodes(values, ids, plots_folder, name):
     generate the ranking.
     """
 
-    ranked = rank_nodes(values, ids)
+    ranked = rank_nodes(values, ids, reversed_mapping=reversed_ids)
     ranked_path = os.path.join(plots_folder, ".".join(["_".join([name, 'list']), 'txt']))
-    for el in ranked:
-        with open(ranked_path, 'a+') as f:
-            f.write("\t".join([el[0], str(el[1])]))
-            f.write("\n")
+    # open the file once, overwriting it, and let the csv module format all ranked nodes through a large write buffer;
+    # quoting is disabled so that stress markers in phonological cues are written as they are
+    with open(ranked_path, 'w', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n', quoting=csv.QUOTE_NONE, quotechar=None)
+        writer.writerows(ranked)
 
     return ranked
@@ -4,6 +4,76 @@ __author__ = 'GCassani'
 
 import numpy as np
 
+# Numba is optional: when it is available, MADs and norms of uncommon orders are computed with compiled kernels that run
+# over rows or columns in parallel, otherwise NumPy is used
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+# Bottleneck is optional as well: it provides a faster median than NumPy for the fallback computation of MADs
+try:
+    from bottleneck import median as bn_median
+except ImportError:
+    bn_median = None
+
+# Joblib is only needed to compute MADs for many matrices in parallel: without it, they are computed one at a time
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
+
+def _as_slice(indices):
+
+    """
+    :param indices: a vector of numerical indices, a range or a slice
+    :return:        a slice selecting the same rows/columns as the input indices if they form a contiguous increasing
+                    range, the input indices otherwise
+
+    Indexing a NumPy array with a slice returns a view, while indexing it with a vector of indices always gathers the
+    selected rows/columns in a new array, even when they are contiguous.
+    """
+
+    if isinstance(indices, slice):
+        return indices
+    if isinstance(indices, range):
+        return slice(indices.start, indices.stop) if indices.step == 1 and indices.start >= 0 else indices
+
+    positions = np.asarray(indices)
+    if positions.ndim != 1 or not len(positions) or not np.issubdtype(positions.dtype, np.integer):
+        return indices
+    if positions[0] < 0 or positions[-1] - positions[0] + 1 != len(positions) or np.any(np.diff(positions) != 1):
+        return indices
+
+    return slice(int(positions[0]), int(positions[-1]) + 1)
+
+
+########################################################################################################################
+
+
+def _select(weight_matrix, indices, axis):
+
+    """
+    :param weight_matrix:   a NumPy matrix
+    :param indices:         a vector of numerical indices, a range or a slice
+    :param axis:            0 if indices refer to rows, 1 if they refer to columns
+    :return:                the selected rows/columns, as a view if they are contiguous
+
+    Contiguous rows/columns are selected through a slice; otherwise np.take is used, which gathers columns from a
+    row-major matrix several times faster than fancy indexing does.
+    """
+
+    indices = _as_slice(indices)
+    if isinstance(indices, slice) or np.asarray(indices).dtype == bool:
+        return weight_matrix[indices, :] if axis == 0 else weight_matrix[:, indices]
+
+    return np.take(weight_matrix, indices, axis=axis)
+
+
+########################################################################################################################
+
 
 def norm(weight_matrix, indices, axis=0, p=1):
 
@@ -11,7 +81,8 @@ def norm(weight_matrix, indices, axis=0, p=1):
     :param weight_matrix:   a NumPy matrix
     :param indices:         a vector of numerical indices indicating which rows or columns to consider
     :param axis:            0 for column-wise vector norms, 1 for row-wise vector norms
-    :param p:               1 to get the absolute length of the vector; 2 to get its Euclidean length
+    :param p:               1 to get the absolute length of the vector; 2 to get its Euclidean length; any other order
+                            accepted by np.linalg.norm
     :return vector_norms:   the p-norm of the vectors, computed according to the specification of p
 
     The function computes the vector norms from the input matrix, according to the order specified by the parameter p,
@@ -26,10 +97,26 @@ def norm(weight_matrix, indices, axis=0, p=1):
 
     """
 
-    if axis:
-        vector_norms = np.linalg.norm(weight_matrix[:, indices], ord=p, axis=axis)
+    sub_matrix = _select(weight_matrix, indices, axis)
+
+    # the 1- and 2-norm are reduced directly, the latter as a single fused sum of squares, without going through the
+    # generic dispatch of np.linalg.norm, which is kept for all other orders. When the selection is already a copy,
+    # absolute values overwrite it rather than going into a new array
+    if p == 1:
+        if np.may_share_memory(sub_matrix, weight_matrix):
+            vector_norms = np.abs(sub_matrix).sum(axis=axis)
+        else:
+            vector_norms = np.abs(sub_matrix, out=sub_matrix).sum(axis=axis)
+    elif p == 2:
+        vector_norms = np.sqrt(np.einsum('ij,ij->i' if axis else 'ij,ij->j', sub_matrix, sub_matrix))
+    elif njit is not None and sub_matrix.size > 1000000 and isinstance(p, (int, np.integer)) and p > 2:
+        # on large matrices, higher integer orders are computed by a compiled kernel that takes absolute values, raises
+        # them to the power of p by repeated multiplication, sums them and takes the root in a single pass over each
+        # vector (fractional orders go through pow, which NumPy computes faster)
+        vectors = sub_matrix if axis else sub_matrix.T
+        vector_norms = _pnorm_rows(np.asarray(vectors, dtype=np.float64), int(p))
     else:
-        vector_norms = np.linalg.norm(weight_matrix[indices, :], ord=p, axis=axis)
+        vector_norms = np.linalg.norm(sub_matrix, ord=p, axis=axis)
 
     return vector_norms
 
@@ -37,12 +124,143 @@ def norm(weight_matrix, indices, axis=0, p=1):
 ########################################################################################################################
 
 
-def median_absolute_deviation(weight_matrix, indices, axis=0):
+def _median(array, axis, overwrite_input=False):
+
+    """
+    :param array:           a NumPy array
+    :param axis:            the axis along which medians are computed
+    :param overwrite_input: a boolean specifying whether the input array can be partially reordered in place, which
+                            spares a copy when it is a temporary array
+    :return:                an array with the medians of the input array along the specified axis
+
+    Bottleneck is used when available; otherwise only the one or two middle elements along the axis are put in their
+    sorted position by partitioning, which is all that is needed to get the median.
+    """
+
+    if bn_median is not None:
+        return bn_median(array, axis=axis)
+
+    n = array.shape[axis]
+    k = n // 2
+    kth = [k] if n % 2 else [k - 1, k]
+    if overwrite_input:
+        array.partition(kth, axis=axis)
+        partitioned = array
+    else:
+        partitioned = np.partition(array, kth, axis=axis)
+
+    if n % 2:
+        return partitioned.take(k, axis=axis)
+    return 0.5 * (partitioned.take(k - 1, axis=axis) + partitioned.take(k, axis=axis))
+
+
+########################################################################################################################
+
+
+def _vector_median(vector):
+
+    """
+    :param vector:  a 1d NumPy array, which is partially reordered in place
+    :return:        the median of the values in the vector
+
+    The element of rank n // 2 is selected in place with quickselect, which leaves all smaller elements before it:
+    for vectors of even length the other middle element is then the largest of those, so no sorting is needed.
+    """
+
+    n = vector.shape[0]
+    k = n // 2
+    left = 0
+    right = n - 1
+    while left < right:
+        pivot = vector[(left + right) // 2]
+        i = left
+        j = right
+        while i <= j:
+            while vector[i] < pivot:
+                i += 1
+            while vector[j] > pivot:
+                j -= 1
+            if i <= j:
+                vector[i], vector[j] = vector[j], vector[i]
+                i += 1
+                j -= 1
+        if k <= j:
+            right = j
+        elif k >= i:
+            left = i
+        else:
+            break
+
+    if n % 2:
+        return vector[k]
+    return 0.5 * (vector[k] + vector[:k].max())
+
+
+########################################################################################################################
+
+
+def _mad_rows(vectors):
+
+    """
+    :param vectors:         a 2d NumPy array
+    :return med_abs_dev:    a 1d NumPy array with the MAD of each row of the input array
+
+    Each row is copied into a scratch buffer, whose median is found by partitioning; absolute deviations from the
+    median then overwrite the same buffer, which is partitioned again. Rows are processed in parallel when the function
+    is compiled with Numba.
+    """
+
+    n_rows, n_cols = vectors.shape
+    med_abs_dev = np.empty(n_rows)
+    for i in prange(n_rows):
+        scratch = vectors[i, :].copy()
+        median = _vector_median(scratch)
+        for j in range(n_cols):
+            scratch[j] = abs(scratch[j] - median)
+        med_abs_dev[i] = _vector_median(scratch)
+
+    return med_abs_dev
+
+
+def _pnorm_rows(vectors, p):
+
+    """
+    :param vectors:         a 2d NumPy array
+    :param p:               a positive integer indicating the order of the norm
+    :return vector_norms:   a 1d NumPy array with the p-norm of each row of the input array
+
+    Rows are processed in parallel when the function is compiled with Numba.
+    """
+
+    n_rows, n_cols = vectors.shape
+    vector_norms = np.empty(n_rows)
+    for i in prange(n_rows):
+        total = 0.0
+        for j in range(n_cols):
+            total += abs(vectors[i, j]) ** p
+        vector_norms[i] = total ** (1.0 / p)
+
+    return vector_norms
+
+
+if njit is not None:
+    _vector_median = njit(fastmath=True, cache=True)(_vector_median)
+    _mad_rows = njit(parallel=True, fastmath=True, cache=True)(_mad_rows)
+    _pnorm_rows = njit(parallel=True, fastmath=True, cache=True)(_pnorm_rows)
+
+
+########################################################################################################################
+
+
+def median_absolute_deviation(weight_matrix, indices, axis=0, sample_size=None, seed=None):
 
     """
     :param weight_matrix:   a NumPy matrix
     :param indices:         a vector of numerical indices indicating which rows or columns to consider
     :param axis:            0 for column-wise MADs, 1 for row-wise MADs
+    :param sample_size:     an integer specifying how many of the rows/columns in indices are randomly sampled (without
+                            replacement) to estimate the MADs. Default is None, meaning that all of them are considered
+    :param seed:            the seed of the random number generator used to sample rows/columns, for reproducibility
     :return med_abs_dev:    an array of MAD values computed over the specified dimension for the specified subset of
                             rows/columns
 
@@ -55,14 +273,39 @@ def median_absolute_deviation(weight_matrix, indices, axis=0):
     - if axis=1, i.e. MADs are computed for row vectors, indices is interpreted as indicating the columns to be
         considered in the computation of the row vector MADs. MADs are computed for all the rows, but only considering
         the columns whose indices are specified in the input vector.
+
+    When sample_size is smaller than the number of indices, MADs are estimated on a random sample of the rows/columns:
+    the standard error of the sample median, hence of the MAD, shrinks as n^(-1/2), so that a sample of a few thousands
+    vectors gives estimates that are very close to the exact ones at a fraction of the cost.
     """
 
+    if sample_size is not None and sample_size < len(indices):
+        rng = np.random.default_rng(seed)
+        indices = np.sort(rng.choice(indices, size=sample_size, replace=False))
+
+    if njit is not None:
+        # the compiled kernel reduces rows, so for column-wise MADs the selected rows are transposed (as a view)
+        if axis == 0:
+            return _mad_rows(np.asarray(_select(weight_matrix, indices, 0), dtype=np.float64).T)
+        return _mad_rows(np.asarray(_select(weight_matrix, indices, 1), dtype=np.float64))
+
+    # select the rows/columns once, and restore the reduced axis of the medians (as a view) so that they broadcast
+    # against the selected rows/columns as they are, without stacking them in a new array. Column-wise MADs are
+    # computed on a C-contiguous transposed copy of the selection, so that both medians are taken over contiguous
+    # memory rather than by striding across rows
     if axis == 0:
-        median = np.median(weight_matrix[indices, :], axis=axis)
-        med_abs_dev = np.median(np.absolute(weight_matrix[indices, :] - median), axis=axis)
+        sub_matrix = np.ascontiguousarray(_select(weight_matrix, indices, 0).T)
+    else:
+        sub_matrix = _select(weight_matrix, indices, 1)
+    median = _median(sub_matrix, axis=1)[:, None]
+
+    # when the selection is already a copy, absolute deviations overwrite it rather than going into a new array
+    if np.may_share_memory(sub_matrix, weight_matrix):
+        deviations = sub_matrix - median
     else:
-        median = np.median(weight_matrix[:, indices], axis=axis)
-        med_abs_dev = np.median(np.absolute(weight_matrix[:, indices] - np.vstack(median)), axis=axis)
+        deviations = np.subtract(sub_matrix, median, out=sub_matrix)
+    np.abs(deviations, out=deviations)
+    med_abs_dev = _median(deviations, axis=1, overwrite_input=True)
 
     return med_abs_dev
 
@@ -70,12 +313,49 @@ def median_absolute_deviation(weight_matrix, indices, axis=0):
 ########################################################################################################################
 
 
-def activations(weight_matrix, indices, axis=0):
+def median_absolute_deviation_batch(matrices, indices_list, axis=0, n_jobs=-1, min_size=20000000):
+
+    """
+    :param matrices:        an iterable of NumPy matrices
+    :param indices_list:    an iterable of vectors of numerical indices, as long as matrices, each indicating which rows
+                            or columns to consider in the matrix at the same position
+    :param axis:            0 for column-wise MADs, 1 for row-wise MADs
+    :param n_jobs:          the number of processes used by joblib; -1 (default) uses all available cores
+    :param min_size:        the total number of values in the input matrices below which MADs are computed serially,
+                            since starting worker processes would then cost more than it saves
+    :return:                a list of arrays of MAD values, one per input matrix, as computed by
+                            median_absolute_deviation
+
+    MADs from different matrices (e.g. the matrices estimated at each time point of a longitudinal design) are
+    independent of each other and are computed in parallel when joblib is available. Large matrices are memory-mapped
+    by joblib rather than copied to the workers.
+    """
+
+    matrices = list(matrices)
+    indices_list = list(indices_list)
+
+    if Parallel is None or n_jobs == 1 or sum(np.size(matrix) for matrix in matrices) < min_size:
+        return [median_absolute_deviation(matrix, indices, axis=axis)
+                for matrix, indices in zip(matrices, indices_list)]
+
+    return Parallel(n_jobs=n_jobs, backend='loky')(delayed(median_absolute_deviation)(matrix, indices, axis=axis)
+                                                   for matrix, indices in zip(matrices, indices_list))
+
+
+########################################################################################################################
+
+
+def activations(weight_matrix, indices, axis=0, totals=None):
 
     """
     :param weight_matrix:   a NumPy matrix
     :param indices:         a vector of numerical indices indicating which rows or columns to consider
     :param axis:            0 for column-wise summed activations, 1 for row-wise summed activations
+    :param totals:          a vector containing the activation values summed over all rows/columns along the specified
+                            axis, i.e. weight_matrix.sum(axis=axis). Default is None, meaning that only the rows/columns
+                            in indices are summed. If it is passed and indices cover more than half of the rows/columns,
+                            the summed activations are derived from the totals by only correcting for the rows/columns
+                            which are missing from indices or that are repeated in it
     :return alphas:         a vector of activation values computed over the specified dimension for the specified subset
                             of rows/columns
 
@@ -89,9 +369,47 @@ def activations(weight_matrix, indices, axis=0):
         to be considered in the computation of the row activation values. Activation values are computed for all
         row vectors, but only considering the columns whose indices are specified in the input vector.
     """
-    if axis == 0:
-        alphas = np.sum(weight_matrix[indices, :], axis=axis)
+
+    if totals is not None and 2 * len(indices) > weight_matrix.shape[axis]:
+        # each row/column contributes to the totals once, so only those occurring a number of times other than one in
+        # indices need to be gathered, and added to the totals weighted by how many times they occur minus one
+        extra = np.bincount(np.asarray(indices, dtype=np.intp), minlength=weight_matrix.shape[axis]) - 1
+        to_correct = np.flatnonzero(extra)
+        if axis == 0:
+            alphas = totals + np.dot(extra[to_correct], np.take(weight_matrix, to_correct, axis=0))
+        else:
+            alphas = totals + np.dot(np.take(weight_matrix, to_correct, axis=1), extra[to_correct])
     else:
-        alphas = np.sum(weight_matrix[:, indices], axis=axis)
+        alphas = np.sum(_select(weight_matrix, indices, axis), axis=axis)
 
     return alphas
+
+
+########################################################################################################################
+
+
+def vector_statistics(weight_matrix, indices, axis=0):
+
+    """
+    :param weight_matrix:   a NumPy matrix
+    :param indices:         a vector of numerical indices indicating which rows or columns to consider
+    :param axis:            0 for column-wise statistics, 1 for row-wise statistics
+    :return med_abs_dev:    an array of MAD values, as computed by median_absolute_deviation
+    :return norms1:         an array of 1-norms, as computed by norm with p=1
+    :return norms2:         an array of 2-norms, as computed by norm with p=2
+    :return alphas:         an array of summed activation values, as computed by activations
+
+    The rows/columns specified by indices are selected from the input matrix once, and all statistics are computed on
+    the same selection, rather than selecting (and copying) the same rows/columns once per statistic.
+    """
+
+    sub_matrix = _select(weight_matrix, indices, axis)
+
+    # all the rows/columns of the selection are considered, which only takes a view of it
+    everything = slice(None)
+    med_abs_dev = median_absolute_deviation(sub_matrix, everything, axis=axis)
+    norms1 = norm(sub_matrix, everything, axis=axis, p=1)
+    norms2 = norm(sub_matrix, everything, axis=axis, p=2)
+    alphas = activations(sub_matrix, everything, axis=axis)
+
+    return med_abs_dev, norms1, norms2, alphas
@@ -2,37 +2,58 @@ __author__ = 'GCassani'
 
 """Functions to visualize activation matrices and rank plots"""
 
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 
-def plot_matrix(weight_matrix, figname='Figure title', output_path=''):
+def plot_matrix(weight_matrix, figname='Figure title', output_path='', max_pixels=4000000):
 
     """
     :param weight_matrix:   a NumPy array
     :param figname:         a string indicating the plot title - default is 'Figure title'
     :param output_path:     a string indicating where to save the plot. If no path is provided (default), the plot is
                             shown in the current window
+    :param max_pixels:      an integer indicating the maximum number of cells of the matrix that are drawn: larger
+                            matrices are subsampled, taking every n-th row and column, since a figure cannot show more
+                            cells than it has pixels anyway. Default is 4 millions; pass None to draw all cells
     """
 
-    fig = plt.figure()
-    im = plt.imshow(weight_matrix, aspect='auto', interpolation='nearest')
-    fig.colorbar(im)
-    plt.xlabel('Outcomes')
-    plt.ylabel('Cues')
-    plt.tick_params(
+    # subsample the matrix first (as a view), then cast it to single precision: colours only have 8 bits per channel,
+    # so it is more than enough to normalize the values, and it halves the data to be read when drawing the image
+    data = np.asarray(weight_matrix)
+    if max_pixels and data.size > max_pixels:
+        stride = int(np.ceil(np.sqrt(data.size / max_pixels)))
+        data = data[::stride, ::stride]
+    data = data.astype(np.float32, copy=False)
+
+    # when the plot is only saved, draw it on a figure attached to the Agg canvas, without initializing the interactive
+    # backend nor registering the figure with pyplot, so that nothing needs to be closed afterwards
+    if output_path:
+        fig = Figure()
+        canvas = FigureCanvasAgg(fig)
+    else:
+        fig = plt.figure()
+    ax = fig.add_subplot()
+
+    im = ax.imshow(data, aspect='auto', interpolation='nearest')
+    fig.colorbar(im, ax=ax)
+    ax.set_xlabel('Outcomes')
+    ax.set_ylabel('Cues')
+    ax.tick_params(
         axis='both',
         which='both',
-        bottom='off',
-        top='off',
-        left='off',
-        right='off',
-        labelbottom='off',
-        labelleft='off')
+        bottom=False,
+        top=False,
+        left=False,
+        right=False,
+        labelbottom=False,
+        labelleft=False)
 
-    plt.title(figname)
+    ax.set_title(figname)
 
     if output_path:
-        fig.savefig(output_path)
-        plt.close(fig)
+        canvas.print_figure(output_path)
     else:
         plt.show()
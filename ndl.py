@@ -5,7 +5,6 @@ __author__ = 'GCassani'
 
 import os
 import argparse
-from rescorla_wagner.ndl import ndl
 
 
 def main():
@@ -23,6 +22,11 @@ def main():
                         help="Specify the value of the beta parameter.")
     parser.add_argument("-l", "--lambda", dest="lam", default=1.0,
                         help="Specify the value of the lambda parameter.")
+    parser.add_argument("-d", "--double", action="store_true", dest="double",
+                        help="Specify whether to estimate associations in double precision (default: False, meaning "
+                             "that single precision is used).")
+    parser.add_argument("-g", "--gpu", action="store_true", dest="gpu",
+                        help="Specify whether to estimate associations on a GPU, which requires CuPy (default: False).")
 
     args = parser.parse_args()
 
@@ -30,8 +34,13 @@ def main():
         raise ValueError("There are problems with the input corpus you provided: either the path does not exist or"
                          "the file extension is not .json. Provide a valid path to a .json file.")
 
+    # import the learning code (and NumPy with it) only once the arguments have been validated, so that asking for
+    # help or passing a wrong path returns immediately
+    from rescorla_wagner.ndl import ndl
+
     ndl(args.input_corpus, longitudinal=args.longitudinal,
-        alpha=float(args.alpha), beta=float(args.beta), lam=float(args.lam))
+        alpha=float(args.alpha), beta=float(args.beta), lam=float(args.lam),
+        dtype='float64' if args.double else 'float32', gpu=args.gpu)
 
 
 ########################################################################################################################
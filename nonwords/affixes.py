@@ -1,7 +1,7 @@
 __author__ = 'GCassani'
 
 import helpers as help
-from collections import defaultdict
+import numpy as np
 
 
 def map_affix_to_idx(affix_file):
@@ -28,32 +28,35 @@ def map_nonwords_to_affix(correlation_file, ids2affixes):
     """
     :param correlation_file:    the path to the file storing correlations for each nonword
     :param ids2affixes:         a dictionary mapping row indices to affixes
-    :return nonwords2affixes:   a dictionary mapping each nonword to all anchors and the corresponding pairwise
-                                correlation between the nonword and anchor semantic vector
+    :return correlations:       a NumPy array with a row per nonword and a column per affix, storing the pairwise
+                                correlation between the nonword and affix semantic vector
+    :return nonwords:           a list containing the nonwords, in the order of the rows of correlations
+    :return affixes:            a list containing the affixes, in the order of the columns of correlations
     """
 
     ids2nonwords = help.map_indices_to_test_words(correlation_file)
 
-    nonwords2affixes = defaultdict(dict)
+    # the first line holds the nonwords, each of the following lines the correlations of all nonwords with one affix:
+    # correlations are parsed at once by NumPy, and the array is transposed to get a row per nonword. Lines are stripped
+    # first, so that trailing tabs do not result in empty fields
     with open(correlation_file, "r") as f:
-        for row_id, line in enumerate(f):
-            words = line.strip().split('\t')
-            for col_id, corr in enumerate(words):
-                if not corr in ids2nonwords.values():
-                    nonwords2affixes[ids2nonwords[col_id]][ids2affixes[row_id]] = float(corr)
+        correlations = np.loadtxt((line.strip() for line in f), delimiter='\t', skiprows=1, ndmin=2).T
+    nonwords = [ids2nonwords[col_id] for col_id in range(correlations.shape[0])]
+    affixes = [ids2affixes[row_id] for row_id in range(1, correlations.shape[1] + 1)]
 
-    return nonwords2affixes
+    return correlations, nonwords, affixes
 
 
 ########################################################################################################################
 
 
-def write_correlations(nonwords2affixes, ids2affixes, output_file, table_format="long", cond="minimalist"):
+def write_correlations(correlations, nonwords, affixes, output_file, table_format="long", cond="minimalist"):
 
     """
-    :param nonwords2affixes:    a dictionary mapping each nonword to all anchors and the corresponding pairwise
-                                correlation between the nonword and anchor semantic vector
-    :param ids2affixes:         a dictionary mapping numerical indices to affixes
+    :param correlations:        a NumPy array with a row per nonword and a column per affix, storing the pairwise
+                                correlation between the nonword and affix semantic vector
+    :param nonwords:            a list containing the nonwords, in the order of the rows of correlations
+    :param affixes:             a list containing the affixes, in the order of the columns of correlations
     :param output_file:         the path to the file where the output is going to be written to
     :param cond:                a string indicating the input used for the experiment
     :param table_format:        a string indicating how to print data to table, either 'long' or 'wide'. In the long
@@ -64,30 +67,25 @@ def write_correlations(nonwords2affixes, ids2affixes, output_file, table_format=
                                 condition.
     """
 
-    inflections = sorted(set(ids2affixes.values()))
+    # affixes are written in alphabetical order, each once; correlations are turned into Python floats so that they are
+    # printed in full, and NumPy formats and writes all rows at once
+    affix_columns = {affix: col_id for col_id, affix in enumerate(affixes)}
+    inflections = sorted(affix_columns)
+    correlations = np.take(correlations, [affix_columns[affix] for affix in inflections], axis=1).astype(object)
+    targets = np.array([nonword.split("|") + [cond] for nonword in nonwords], dtype=object).reshape(len(nonwords), 3)
 
     with open(output_file, "w") as f:
 
         if table_format == 'long':
-            f.write('\t'.join(["Nonword", "Target", "Condition", "Affix", "Correlation"]))
-            f.write('\n')
-            for nonword in nonwords2affixes:
-                baseform, tag = nonword.split("|")
-                for affix in inflections:
-                    corr = str(nonwords2affixes[nonword][affix])
-                    f.write('\t'.join([baseform, tag, cond, affix, corr]))
-                    f.write('\n')
+            affixes = np.array(inflections, dtype=object).reshape(len(inflections), 1)
+            table = np.hstack([np.repeat(targets, len(inflections), axis=0), np.tile(affixes, (len(nonwords), 1)),
+                               correlations.reshape(-1, 1)])
+            np.savetxt(f, table, fmt='%s', delimiter='\t', comments='',
+                       header='\t'.join(["Nonword", "Target", "Condition", "Affix", "Correlation"]))
 
         elif table_format == 'wide':
-            f.write('\t'.join(["Nonword", "Target", "Condition", "\t".join(inflections)]))
-            f.write('\n')
-            for nonword in nonwords2affixes:
-                baseform, tag = nonword.split("|")
-                correlations = []
-                for affix in inflections:
-                    correlations.append(str(nonwords2affixes[nonword][affix]))
-                f.write('\t'.join([baseform, tag, cond, '\t'.join(correlations)]))
-                f.write('\n')
+            np.savetxt(f, np.hstack([targets, correlations]), fmt='%s', delimiter='\t', comments='',
+                       header='\t'.join(["Nonword", "Target", "Condition", '\t'.join(inflections)]))
 
         else:
             raise ValueError("unrecognized format %s!" % table_format)
@@ -112,5 +110,5 @@ def affix_analysis(affix_file, correlations_file, output_file, table_format="lon
     """
 
     ids2affixes = map_affix_to_idx(affix_file)
-    nonwords2affixes = map_nonwords_to_affix(correlations_file, ids2affixes)
-    write_correlations(nonwords2affixes, ids2affixes, output_file, table_format=table_format, cond=cond)
+    correlations, nonwords, affixes = map_nonwords_to_affix(correlations_file, ids2affixes)
+    write_correlations(correlations, nonwords, affixes, output_file, table_format=table_format, cond=cond)
@@ -1,6 +1,7 @@
 __author__ = 'GCassani'
 
 import helpers as help
+import numpy as np
 from collections import defaultdict
 
 
@@ -28,51 +29,56 @@ def map_nonwords_to_anchors(correlation_file, ids2anchors):
     """
     :param correlation_file:    the path to the file storing correlations for each nonword
     :param ids2anchors:         a dictionary mapping row indices to anchor words
-    :return nonwords2anchors:   a dictionary mapping each nonword to all anchors and the corresponding pairwise
+    :return correlations:       a NumPy array with a row per nonword and a column per anchor, storing the pairwise
                                 correlation between the nonword and anchor semantic vector
+    :return nonwords:           a list containing the nonwords, in the order of the rows of correlations
+    :return anchors:            a list containing the anchors, in the order of the columns of correlations
     """
 
     ids2nonwords = help.map_indices_to_test_words(correlation_file)
 
-    nonwords2anchors = defaultdict(dict)
+    # the first line holds the nonwords, each of the following lines the correlations of all nonwords with one anchor:
+    # correlations are parsed at once by NumPy, and the array is transposed to get a row per nonword. Lines are stripped
+    # first, so that trailing tabs do not result in empty fields
     with open(correlation_file, "r") as f:
-        for row_id, line in enumerate(f):
-            words = line.strip().split('\t')
-            for col_id, corr in enumerate(words):
-                if corr not in ids2nonwords.values():
-                    nonwords2anchors[ids2nonwords[col_id]][ids2anchors[row_id]] = float(corr)
+        correlations = np.loadtxt((line.strip() for line in f), delimiter='\t', skiprows=1, ndmin=2).T
+    nonwords = [ids2nonwords[col_id] for col_id in range(correlations.shape[0])]
+    anchors = [ids2anchors[row_id] for row_id in range(1, correlations.shape[1] + 1)]
 
-    return nonwords2anchors
+    return correlations, nonwords, anchors
 
 
 ########################################################################################################################
 
 
-def get_most_correlated_anchor(nonwords2anchors):
+def get_most_correlated_anchor(correlations, nonwords, anchors):
 
     """
-    :param nonwords2anchors:    a dictionary mapping each nonword to all anchors and the corresponding pairwise
+    :param correlations:        a NumPy array with a row per nonword and a column per anchor, storing the pairwise
                                 correlation between the nonword and anchor semantic vector
+    :param nonwords:            a list containing the nonwords, in the order of the rows of correlations
+    :param anchors:             a list containing the anchors, in the order of the columns of correlations
     :return most_correlated:    a dictionary mapping each nonword to the closest nouns and the highest noun correlation,
                                 and to the closest verb and the highest verb correlation
     """
 
-    most_correlated = defaultdict(dict)
+    # find the most correlated noun and verb of all nonwords at once; a nonword is only mapped to an anchor with a
+    # positive correlation
+    is_noun = np.array([anchor.split(':')[1] == "N" for anchor in anchors], dtype=bool)
+
+    best = {}
+    for category, columns in (("noun", np.flatnonzero(is_noun)), ("verb", np.flatnonzero(~is_noun))):
+        if columns.size:
+            best_columns = columns[np.take(correlations, columns, axis=1).argmax(axis=1)]
+            highest = correlations[np.arange(len(nonwords)), best_columns]
+        else:
+            best_columns = np.zeros(len(nonwords), dtype=int)
+            highest = np.zeros(len(nonwords))
+        best[category] = [(anchors[column], corr) if corr > 0 else ("none", 0)
+                          for column, corr in zip(best_columns.tolist(), highest.tolist())]
 
-    for nonword in nonwords2anchors:
-        best_noun, best_verb = ["none", "none"]
-        highest_noun, highest_verb = [0, 0]
-        for anchor in nonwords2anchors[nonword]:
-            base, pos = anchor.split(':')
-            corr = nonwords2anchors[nonword][anchor]
-            if pos == "N":
-                if corr > highest_noun:
-                    highest_noun = corr
-                    best_noun = anchor
-            else:
-                if corr > highest_noun:
-                    highest_verb = corr
-                    best_verb = anchor
+    most_correlated = defaultdict(dict)
+    for nonword, (best_noun, highest_noun), (best_verb, highest_verb) in zip(nonwords, best["noun"], best["verb"]):
         most_correlated[nonword] = {"closest noun": best_noun,
                                     "closest verb": best_verb,
                                     "corr noun": highest_noun,
@@ -84,13 +90,14 @@ def get_most_correlated_anchor(nonwords2anchors):
 ########################################################################################################################
 
 
-def write_correlations(nonwords2anchors, output_file, ids2anchors, cond="minimalist", table_format="long"):
+def write_correlations(correlations, nonwords, anchors, output_file, cond="minimalist", table_format="long"):
 
     """
-    :param nonwords2anchors:    a dictionary mapping each nonword to all anchors and the corresponding pairwise
+    :param correlations:        a NumPy array with a row per nonword and a column per anchor, storing the pairwise
                                 correlation between the nonword and anchor semantic vector
+    :param nonwords:            a list containing the nonwords, in the order of the rows of correlations
+    :param anchors:             a list containing the anchors, in the order of the columns of correlations
     :param output_file:         the path where the summary will be written to
-    :param ids2anchors:         a dictionary mapping numerical indices to anchor words
     :param cond:                a string indicating the input used for the experiment
     :param table_format:        a string indicating how to print data to table, either 'long' or 'wide'. In the long
                                 format, six columns are created, first the nonword followed by its intended pos tag,
@@ -101,32 +108,25 @@ def write_correlations(nonwords2anchors, output_file, ids2anchors, cond="minimal
                                 column indicates the condition.
     """
 
-    # make sure to only use anchor words (and no headers)
-    anchors = sorted(ids2anchors.values())
+    # anchors are written in alphabetical order, each once; correlations are turned into Python floats so that they are
+    # printed in full, and NumPy formats and writes all rows at once
+    anchor_columns = {anchor: col_id for col_id, anchor in enumerate(anchors)}
+    anchors = sorted(anchor_columns)
+    correlations = np.take(correlations, [anchor_columns[anchor] for anchor in anchors], axis=1).astype(object)
+    targets = np.array([nonword.split("|") + [cond] for nonword in nonwords], dtype=object).reshape(len(nonwords), 3)
 
     with open(output_file, "w") as f:
 
         if table_format == "long":
-            f.write('\t'.join(["Nonword", "Target", "Condition", "Anchor", "Category", "Correlation"]))
-            f.write('\n')
-            for nonword in nonwords2anchors:
-                baseform, tag = nonword.split("|")
-                for anchor in sorted(nonwords2anchors[nonword]):
-                    word, pos = anchor.split(":")
-                    corr = str(nonwords2anchors[nonword][anchor])
-                    f.write('\t'.join([baseform, tag, cond, word, pos, corr]))
-                    f.write('\n')
+            categories = np.array([anchor.split(":") for anchor in anchors], dtype=object).reshape(len(anchors), 2)
+            table = np.hstack([np.repeat(targets, len(anchors), axis=0), np.tile(categories, (len(nonwords), 1)),
+                               correlations.reshape(-1, 1)])
+            np.savetxt(f, table, fmt='%s', delimiter='\t', comments='',
+                       header='\t'.join(["Nonword", "Target", "Condition", "Anchor", "Category", "Correlation"]))
 
         elif table_format == "wide":
-            f.write("\t".join(["Nonword", "Target", "Condition", "\t".join(anchors)]))
-            f.write('\n')
-            for nonword in nonwords2anchors:
-                baseform, tag = nonword.split("|")
-                correlations = []
-                for anchor in sorted(nonwords2anchors[nonword]):
-                    correlations.append(str(nonwords2anchors[nonword][anchor]))
-                f.write('\t'.join([baseform, tag, cond, "\t".join(correlations)]))
-                f.write('\n')
+            np.savetxt(f, np.hstack([targets, correlations]), fmt='%s', delimiter='\t', comments='',
+                       header="\t".join(["Nonword", "Target", "Condition", "\t".join(anchors)]))
 
         else:
             raise ValueError("unrecognized format %s!" % table_format)
@@ -152,5 +152,5 @@ def anchor_analysis(anchors_file, correlations_file, output_file, table_format="
     """
 
     ids2anchors = map_anchors_to_idx(anchors_file)
-    nonwords2anchors = map_nonwords_to_anchors(correlations_file, ids2anchors)
-    write_correlations(nonwords2anchors, output_file, ids2anchors, table_format=table_format, cond=cond)
+    correlations, nonwords, anchors = map_nonwords_to_anchors(correlations_file, ids2anchors)
+    write_correlations(correlations, nonwords, anchors, output_file, table_format=table_format, cond=cond)
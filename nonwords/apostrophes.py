@@ -1,5 +1,7 @@
 __author__ = 'GCassani'
 
+import re
+
 
 def store_apostrophe_mapping(in_file):
 
@@ -29,14 +31,24 @@ def substitute_apostrophes(source_file, dest_file, mapping):
     :param mapping:     the dictionary mapping old forms to corresponding new forms
     """
 
-    with open(dest_file, 'w') as fw:
-        with open(source_file, 'r') as fr:
-            for line in fr:
-                new_line = line.strip()
-                substitutions = {s for s in set(mapping.keys()) if s in new_line}
-                if substitutions:
-                    for substitution in substitutions:
-                        new = mapping[substitution]
-                        new_line = new_line.replace(substitution, new)
-                fw.write(new_line)
-                fw.write('\n')
+    # all old forms are matched by a single compiled pattern, which replaces them in one pass over each line rather
+    # than looking for every old form in every line; longer forms come first, so that a form is not replaced by the
+    # mapping of a shorter form it contains
+    forms = sorted(mapping, key=len, reverse=True)
+    pattern = re.compile('|'.join(map(re.escape, forms))) if forms else None
+
+    # if all old forms are single characters, a translation table makes the same substitutions in one pass without
+    # going through the regular expression engine and calling back into Python for every match
+    table = str.maketrans(mapping) if forms and len(forms[0]) == 1 else None
+
+    # both files go through large buffers, and output lines are handed to the file in a single writelines call rather
+    # than with two write calls per line
+    with open(dest_file, 'w', buffering=1 << 20) as fw:
+        with open(source_file, 'r', buffering=1 << 20) as fr:
+            if table is not None:
+                new_lines = (line.strip().translate(table) for line in fr)
+            elif pattern is not None:
+                new_lines = (pattern.sub(lambda match: mapping[match.group(0)], line.strip()) for line in fr)
+            else:
+                new_lines = (line.strip() for line in fr)
+            fw.writelines(new_line + '\n' for new_line in new_lines)
@@ -7,6 +7,27 @@ from corpus.encode.item import encode_item
 from corpus.encode.words.phonology import get_phonetic_encoding
 
 
+# multi-word tokens which are transcribed without apostrophes, mapped to their correct spelling
+_APOSTROPHE_FIXES = {'oclock': "o'clock",
+                     'wheres_kitty': "where's_kitty",
+                     'whats_her_name': "what's_her_name",
+                     'thats_entertainment': "that's_entertainment",
+                     'childrens_museum': "children's_museum",
+                     'childrens_hospital': "children's_hospital"}
+
+# TreeTagger tags which mark derivational morphology, mapped to the corresponding code; all other tags are coded as BASE
+_DERIVATIONAL_CODES = {'JJS': 'SUPERLATIVE',
+                       'JJR': 'COMPARATIVE',
+                       'NNS': 'PL',
+                       'VBG': 'CONTINUOUS',
+                       'VBZ': 'PERSON3',
+                       'VBD': 'PAST',
+                       'VBN': 'PAST'}
+
+
+########################################################################################################################
+
+
 def adjust_apostrophes(token, lemma):
 
     """
@@ -15,29 +36,11 @@ def adjust_apostrophes(token, lemma):
     """
 
     # adjust apostrophes!
-    if token == 'oclock':
-        new_token = "o'clock"
-        new_lemma = "o'clock"
-    elif token == 'wheres_kitty':
-        new_token = "where's_kitty"
-        new_lemma = "where's_kitty"
-    elif token == 'whats_her_name':
-        new_token = "what's_her_name"
-        new_lemma = "what's_her_name"
-    elif token == 'thats_entertainment':
-        new_token = "that's_entertainment"
-        new_lemma = "that's_entertainment"
-    elif token == 'childrens_museum':
-        new_token = "children's_museum"
-        new_lemma = "children's_museum"
-    elif token == 'childrens_hospital':
-        new_token = "children's_hospital"
-        new_lemma = "children's_hospital"
-    else:
-        new_token = token
-        new_lemma = lemma
-
-    return new_token, new_lemma
+    fixed = _APOSTROPHE_FIXES.get(token)
+    if fixed is not None:
+        return fixed, fixed
+
+    return token, lemma
 
 
 ########################################################################################################################
@@ -50,22 +53,7 @@ def code_derivational_morphology(pos):
     :return deriv:  the recoded derivational formology
     """
 
-    if pos == 'JJS':
-        deriv = 'SUPERLATIVE'
-    elif pos == 'JJR':
-        deriv = 'COMPARATIVE'
-    elif pos == 'NNS':
-        deriv = 'PL'
-    elif pos == 'VBG':
-        deriv = 'CONTINUOUS'
-    elif pos == 'VBZ':
-        deriv = 'PERSON3'
-    elif pos == 'VBD' or pos == 'VBN':
-        deriv = 'PAST'
-    else:
-        deriv = 'BASE'
-
-    return deriv
+    return _DERIVATIONAL_CODES.get(pos, 'BASE')
 
 
 ########################################################################################################################
@@ -81,11 +69,9 @@ def write_mapping_file(mapping, output_file):
     """
 
     with open(output_file, 'w') as fw:
-        for word in mapping:
+        for word, triphones in mapping.items():
             token, lemma, pos1, pos2, deriv, morpho, token_pos = word.split('|')
-            triphones = mapping[word]
-            fw.write('\t'.join([token, lemma, pos1, pos2, deriv, morpho, token_pos, triphones]))
-            fw.write('\n')
+            fw.write('\t'.join([token, lemma, pos1, pos2, deriv, morpho, token_pos, triphones]) + '\n')
 
 
 ########################################################################################################################
@@ -106,25 +92,21 @@ def write_output_corpus(new_corpus, output_file, lemmas2phonetics, minimalist=Tr
     """
 
     with open(output_file, 'w') as fw2:
-        for utterance in new_corpus:
-            if minimalist:
-                fw2.write(','.join('|'.join(word) for word in utterance))
-                fw2.write('\n')
-            else:
+        if minimalist:
+            fw2.writelines(','.join('|'.join(word) for word in utterance) + '\n' for utterance in new_corpus)
+        else:
+            # a lemma is differentiated when it has more than one phonetic realization and the PoS tag of the word is
+            # found with any of them: all such pairs of lemma and PoS tag are collected once, before going through words
+            ambiguous = {(lemma, pos_tag) for lemma, phonetic_codings in lemmas2phonetics.items()
+                         if len(phonetic_codings) > 1
+                         for pos_tags in phonetic_codings.values() for pos_tag in pos_tags}
+            for utterance in new_corpus:
                 output_utterance = []
                 for word in utterance:
                     token, lemma, pos1, pos2, triphones = word
-                    out_lemma = lemma
-                    if len(lemmas2phonetics[lemma]) > 1:
-                        for phonetic_coding in lemmas2phonetics[lemma]:
-                            pos_tags = lemmas2phonetics[lemma][phonetic_coding]
-                            for pos_tag in pos_tags:
-                                if pos_tag == pos1:
-                                    out_lemma = ':'.join([lemma, pos1])
-                                    break
+                    out_lemma = ':'.join([lemma, pos1]) if (lemma, pos1) in ambiguous else lemma
                     output_utterance.append('|'.join([token, out_lemma, pos1, pos2, triphones]))
-                fw2.write(','.join(output_utterance))
-                fw2.write('\n')
+                fw2.write(','.join(output_utterance) + '\n')
 
 
 ########################################################################################################################
@@ -158,47 +140,61 @@ def map_phonology(corpus_file, mapping_file, output_file, celex_dir, compounds=T
 
     new_corpus = []
 
+    # words recur many times in child-directed speech: each distinct word is looked up in Celex and encoded the first
+    # time it is found, and later occurrences reuse the resulting 5-tuple, or are skipped if no phonological form could
+    # be retrieved; the mapping and the lemma phonology only change the first time a word is found
+    encoded_words = {}
+
     with open(corpus_file, 'r') as fr:
         for line in fr:
             words = line.strip().split(',')
             new_line = []
             for word in words:
                 if word:
-                    try:
-                        token, lemma, pos1, pos2 = word.split('|')
-                    except ValueError:
-                        token, lemma, pos1 = word.split('|')
-                        pos2 = 'NN' if pos1 == 'N' else pos1
-
-                    new_token, new_lemma = adjust_apostrophes(token, lemma)
-                    new_token = new_token.replace('=', '_')
-                    new_lemma = new_lemma.replace('=', '_')
-                    token_phonological_form = get_phonetic_encoding([(new_token, pos1, new_lemma)],
-                                                                    celex_dict, tokens2identifiers)
-                    lemma_phonology = get_phonetic_encoding([(new_lemma, pos1, new_lemma)],
-                                                            celex_dict, tokens2identifiers)
-                    lemma_phonological_form = ''.join(lemma_phonology) if isinstance(lemma_phonology, list) else \
-                        ''.join(token_phonological_form)
-
-                    if isinstance(token_phonological_form, list):
-                        triphones = encode_item(token_phonological_form[0], triphones=True, stress_marker=True,
-                                                uniphones=False, diphones=False, syllables=False)
-                        deriv = code_derivational_morphology(pos2)
-                        output_token = token.replace('_', '=')
-                        output_lemma = lemma.replace('_', '=')
-
-                        morpho = 'COMPOUND' if '=' in output_token else 'MONO'
-                        key = '|'.join([output_token, output_lemma, pos1, pos2, deriv, morpho,
-                                        ':'.join([output_token, pos1])])
-                        output_triphones = ';'.join(triphones)
-
-                        mapping[key] = output_triphones
-                        if lemma_phonological_form in lemma2phon[output_lemma]:
-                            lemma2phon[output_lemma][lemma_phonological_form].add(pos1)
-                        else:
-                            lemma2phon[output_lemma][lemma_phonological_form] = {pos1}
-
-                        new_line.append((output_token, ':'.join([output_lemma, pos1]), pos1, pos2, output_triphones))
+                    if word in encoded_words:
+                        encoded_word = encoded_words[word]
+                    else:
+                        encoded_word = None
+                        try:
+                            token, lemma, pos1, pos2 = word.split('|')
+                        except ValueError:
+                            token, lemma, pos1 = word.split('|')
+                            pos2 = 'NN' if pos1 == 'N' else pos1
+
+                        new_token, new_lemma = adjust_apostrophes(token, lemma)
+                        new_token = new_token.replace('=', '_')
+                        new_lemma = new_lemma.replace('=', '_')
+                        token_phonological_form = get_phonetic_encoding([(new_token, pos1, new_lemma)],
+                                                                        celex_dict, tokens2identifiers)
+                        lemma_phonology = get_phonetic_encoding([(new_lemma, pos1, new_lemma)],
+                                                                celex_dict, tokens2identifiers)
+                        lemma_phonological_form = ''.join(lemma_phonology) if isinstance(lemma_phonology, list) \
+                            else ''.join(token_phonological_form)
+
+                        if isinstance(token_phonological_form, list):
+                            triphones = encode_item(token_phonological_form[0], triphones=True, stress_marker=True,
+                                                    uniphones=False, diphones=False, syllables=False)
+                            deriv = code_derivational_morphology(pos2)
+                            output_token = token.replace('_', '=')
+                            output_lemma = lemma.replace('_', '=')
+
+                            morpho = 'COMPOUND' if '=' in output_token else 'MONO'
+                            key = '|'.join([output_token, output_lemma, pos1, pos2, deriv, morpho,
+                                            ':'.join([output_token, pos1])])
+                            output_triphones = ';'.join(triphones)
+
+                            mapping[key] = output_triphones
+                            if lemma_phonological_form in lemma2phon[output_lemma]:
+                                lemma2phon[output_lemma][lemma_phonological_form].add(pos1)
+                            else:
+                                lemma2phon[output_lemma][lemma_phonological_form] = {pos1}
+
+                            encoded_word = (output_token, ':'.join([output_lemma, pos1]), pos1, pos2,
+                                            output_triphones)
+                        encoded_words[word] = encoded_word
+
+                    if encoded_word is not None:
+                        new_line.append(encoded_word)
             new_corpus.append(new_line)
 
     write_mapping_file(mapping, mapping_file)
@@ -35,8 +35,7 @@ def map_words_to_pos(tokens_file):
     wordform2pos = defaultdict(set)
     with open(tokens_file, 'r') as f:
         for line in f:
-            word = line.strip().split('\t')[0]
-            pos = line.strip().split('\t')[2]
-            wordform2pos[word].add(pos)
+            fields = line.strip().split('\t')
+            wordform2pos[fields[0]].add(fields[2])
 
     return wordform2pos
@@ -38,10 +38,13 @@ def encode_corpus(corpus, celex_dict, tokens2identifiers, pos_dict,
     """
 
     total = len(corpus[0])
-    check_points = {np.floor(total / float(100) * n): n for n in np.linspace(5, 100, 20)}
+    check_points = {int(np.floor(total / float(100) * n)): n for n in np.linspace(5, 100, 20)}
 
     all_cues, all_outcomes = [[], []]
 
+    # the table used to delete quotes from phonological representations is the same for all utterances
+    quotes_table = str.maketrans(dict.fromkeys('"'))
+
     # for every utterance in the input corpus, remove words with a PoS tag that doesn't belong to the
     # dictionary of PoS mappings; then map valid words to the right PoS tag as indicated by the PoS dictionary
 
@@ -66,8 +69,7 @@ def encode_corpus(corpus, celex_dict, tokens2identifiers, pos_dict,
 
                 utterance = concatenate_phonological_representations(phonological_representations,
                                                                      boundaries=boundaries)
-                table = str.maketrans(dict.fromkeys('"'))
-                utterance = utterance.translate(table)
+                utterance = utterance.translate(quotes_table)
 
                 n_phones = encode_item(utterance, uniphones=uni_phones, diphones=di_phones,
                                        triphones=tri_phones, syllables=syllable, stress_marker=stress_marker)
@@ -100,10 +102,8 @@ def corpus2txt(corpus, output_file):
     :param output_file: the path to a .txt file where the information in corpus will be written to
     """
 
-    with open(output_file, "w") as f:
-        for utterance in corpus:
-            f.write(",".join(utterance))
-            f.write("\n")
+    with open(output_file, "w", buffering=1 << 20) as f:
+        f.writelines(",".join(utterance) + "\n" for utterance in corpus)
 
 
 ########################################################################################################################
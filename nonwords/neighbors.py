@@ -17,18 +17,22 @@ def map_neighbours_to_pos(neighbours_file, wordform2pos, ids2words):
                             with which it was retrieved are considered
     """
 
+    # test items are collected in a set, so that telling neighbours from test items takes a single lookup per cell
+    targets = set(ids2words.values())
+
     neighbours = defaultdict(list)
     with open(neighbours_file, "r") as f:
         for line in f:
             words = line.strip().split('\t')
             for col_id, word in enumerate(words):
-                if not word in ids2words.values():
+                if word not in targets:
+                    target = ids2words[col_id]
                     if ':' in word:
-                        neighbours[ids2words[col_id]].append(word.split(':')[1])
+                        neighbours[target].append(word.split(':')[1])
                     else:
                         target_tags = wordform2pos[word]
-                        for tag in target_tags:
-                            neighbours[ids2words[col_id]].append(tag)
+                        if target_tags:
+                            neighbours[target].extend(target_tags)
 
     return neighbours
 
@@ -45,14 +49,15 @@ def get_tag_distribution(neighbours):
     :return pos_set:            a set containing the unique pos tags found in the neighbours list
     """
 
-    neighbours_distr = defaultdict(dict)
+    # each word is assigned its tag counts at once, and the tags found in its neighbourhood are added to the set at once;
+    # words without any tagged neighbour are left out, as they have no category to count
+    neighbours_distr = {}
     pos_set = set()
     for word in neighbours:
-        neighbours_list = neighbours[word]
-        distr = Counter(neighbours_list)
-        for pos in distr:
-            neighbours_distr[word][pos] = distr[pos]
-            pos_set.add(pos)
+        distr = Counter(neighbours[word])
+        if distr:
+            neighbours_distr[word] = dict(distr)
+            pos_set.update(distr)
 
     return neighbours_distr, pos_set
 
@@ -81,30 +86,18 @@ def write_neighbor_summary(output_file, neighbours_distr, pos_set, table_format=
     with open(output_file, "w") as f:
 
         if table_format == "wide":
-            f.write("\t".join(["Nonword", "Target", "Condition", "\t".join(pos_tags)]))
-            f.write('\n')
-            for word in neighbours_distr:
+            f.write("\t".join(["Nonword", "Target", "Condition", "\t".join(pos_tags)]) + '\n')
+            for word, distr in neighbours_distr.items():
                 baseform, target = word.split("|")
-                counts = []
-                for tag in pos_tags:
-                    try:
-                        counts.append(str(neighbours_distr[word][tag]))
-                    except KeyError:
-                        counts.append("0")
-                f.write('\t'.join([baseform, target, cond, '\t'.join(counts)]))
-                f.write('\n')
+                counts = [str(distr.get(tag, 0)) for tag in pos_tags]
+                f.write('\t'.join([baseform, target, cond, '\t'.join(counts)]) + '\n')
 
         elif table_format == "long":
-            f.write("\t".join(["Nonword", "Target", "Condition", "Category", "Count"]))
-            f.write('\n')
-            for word in neighbours_distr:
+            f.write("\t".join(["Nonword", "Target", "Condition", "Category", "Count"]) + '\n')
+            for word, distr in neighbours_distr.items():
                 baseform, target = word.split("|")
-                for tag in pos_tags:
-                    try:
-                        f.write('\t'.join([baseform, target, cond, tag, str(neighbours_distr[word][tag])]))
-                    except KeyError:
-                        f.write('\t'.join([baseform, target, cond, tag, '0']))
-                    f.write('\n')
+                f.writelines('\t'.join([baseform, target, cond, tag, str(distr.get(tag, 0))]) + '\n'
+                             for tag in pos_tags)
 
         else:
             raise ValueError("unrecognized format %s!" % table_format)
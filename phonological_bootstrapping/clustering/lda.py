@@ -33,7 +33,7 @@ def _fit_k(matrix, targets, how_many=100):
     accuracy = clf.score(matrix, targets)
 
     # fit a LDA classifier only using the cues with the highest variance, the get its accuracy
-    matrix_subset = matrix[:, useful_dimensions]
+    matrix_subset = np.take(matrix, useful_dimensions, axis=1)
     clf.fit(matrix_subset, targets)
     accuracy_subset = clf.score(matrix_subset, targets)
 
@@ -69,7 +69,7 @@ def _fit_t(matrix, targets, threshold=0.00005):
     accuracy = clf.score(matrix, targets)
 
     # fit a LDA classifier only using the cues with the highest variance, the get its accuracy
-    matrix_subset = matrix[:, useful_dimensions]
+    matrix_subset = np.take(matrix, useful_dimensions, axis=1)
     clf.fit(matrix_subset, targets)
     accuracy_subset = clf.score(matrix_subset, targets)
 
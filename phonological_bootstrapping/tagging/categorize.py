@@ -83,9 +83,10 @@ def categorize(test_items, weights_matrix, cues2ids, outcomes2ids, method='freq'
     :return freq:           the frequency with which the most frequent PoS tag applied by the model is actually applied
     """
 
+    # the baseline considers all cues at once, so outcome activations are simply the column sums of the matrix
     to_filter = set()
     baseline_activations = compute_outcomes_activations(cues2ids.keys(), weights_matrix, cues2ids,
-                                                        outcomes2ids, to_filter)
+                                                        outcomes2ids, to_filter, totals=weights_matrix.sum(axis=0))
     sorted_baseline_activations = sorted(baseline_activations.items(), key=operator.itemgetter(1), reverse=True)
 
     # if top active outcomes at baseline need to be flushed away, store flushed outcomes in a set and store the other
@@ -105,16 +106,16 @@ def categorize(test_items, weights_matrix, cues2ids, outcomes2ids, method='freq'
 
     log_dict = defaultdict(dict)
 
+    # check the type of the test items once, before any of them is processed
+    if not all(isinstance(item, str) for item in test_items):
+        raise ValueError("The input items must consist of strings: check your input file!")
+
     tags = set()
     for item in test_items:
 
-        tags.add(item.split("|")[1])
-
-        if not isinstance(item, str):
-            ValueError("The input items must consist of strings: check your input file!")
-
         # split the test token from its Part-of-Speech and encode it in nphones
         word, target_pos = item.split('|')
+        tags.add(target_pos)
         if boundaries:
             word = '+' + word + '+'
         nphones = encode_item(word, uniphones=uniphones, diphones=diphones,
@@ -64,7 +64,7 @@ def std_res(observed, expected):
 ########################################################################################################################
 
 
-def compute_outcomes_activations(nphones, associations_matrix, cues2ids, outcomes2ids, to_filter):
+def compute_outcomes_activations(nphones, associations_matrix, cues2ids, outcomes2ids, to_filter, totals=None):
 
     """
     :param nphones:             an iterable containing strings. Each string represent a phoneme sequence.
@@ -75,6 +75,9 @@ def compute_outcomes_activations(nphones, associations_matrix, cues2ids, outcome
                                 values are integers.
     :param to_filter:           an iterable containing strings indicating prohibited outcomes, i.e. outcomes that
                                 should not be considered; if empty, all outcomes are considered
+    :param totals:              a NumPy array containing the activation of each outcome summed over all cues, i.e. the
+                                column sums of the associations matrix. When passed, activations given many cues are
+                                derived from it rather than by summing all the corresponding rows
     :return sorted_nodes:       a dictionary mapping strings to numbers. Strings are outcomes and numbers are total
                                 activations given a set of phonetic cues, that define the rows over which the sum is
                                 computed.
@@ -90,7 +93,7 @@ def compute_outcomes_activations(nphones, associations_matrix, cues2ids, outcome
             pass
 
     # get the summed activation for each outcome given the active n-phones from the input
-    alphas = activations(associations_matrix, cue_mask)
+    alphas = activations(associations_matrix, cue_mask, totals=totals)
 
     # reverse the input dictionary providing outcome to column index mapping and get the column index to outcome mapping
     # this is needed because we want to know which outcome does the i-th column correspond to
@@ -6,10 +6,348 @@ import os
 import json
 import numpy as np
 from time import strftime
-from corpus.cues_outcomes import get_cues_and_outcomes
+from corpus.cues_outcomes import get_cues_and_outcomes, trials_to_ids
 
+# Numba is optional: when it is available, learning trials are processed by compiled loops, otherwise by NumPy
+try:
+    from numba import njit, prange, get_num_threads
+except ImportError:
+    njit = None
+    prange = range
 
-def compute_activations(input_file, output_files, alpha, beta, lam, indices):
+# CuPy is optional as well, and only needed to estimate associations on a GPU
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+def _learn(weight_matrix, cue_indptr, cue_ids, outcome_indptr, outcome_ids, start, stop, learning_rates, lam):
+
+    """
+    :param weight_matrix:       a NumPy array with as many rows as there are cues and as many columns as there are
+                                outcomes, which is updated in place
+    :param cue_indptr:          a NumPy array such that the cue indices of the i-th learning trial are found between
+                                positions cue_indptr[i] and cue_indptr[i+1] in cue_ids
+    :param cue_ids:             a NumPy array with the cue indices of all learning trials, as built by trials_to_ids
+    :param outcome_indptr:      a NumPy array such that the outcome indices of the i-th learning trial are found
+                                between positions outcome_indptr[i] and outcome_indptr[i+1] in outcome_ids
+    :param outcome_ids:         a NumPy array with the outcome indices of all learning trials, as built by trials_to_ids
+    :param start:               the index of the first learning trial to be processed
+    :param stop:                the index of the learning trial where to stop (excluded)
+    :param learning_rates:      a NumPy array with the learning rate of each learning trial, i.e. the product of alpha
+                                and beta adjusted for runs of repeated learning trials, as computed by _repetition_rates:
+                                trials with a learning rate of 0 are skipped
+    :param lam:                 maximum amount of association that an outcome can receive from all the cues
+    """
+
+    # the masking vector for outcomes is allocated once and only the positions of the outcomes in each learning trial
+    # are set and then cleared again
+    outcome_mask = np.zeros(weight_matrix.shape[1], dtype=weight_matrix.dtype)
+
+    # as in _learn_compiled, only the columns up to the highest index of the outcomes experienced so far are gathered,
+    # summed and updated, since associations with outcomes that are yet to be experienced are 0 and do not change
+    n_active = int(outcome_ids[:outcome_indptr[start]].max()) + 1 if outcome_indptr[start] else 0
+
+    for i in range(start, stop):
+        # learning trials repeating the previous one have already been accounted for in its learning rate
+        if learning_rates[i] == 0:
+            continue
+
+        # get the indices of the cues and outcomes in the learning trial as views of the arrays encoding the corpus
+        cue_mask = cue_ids[cue_indptr[i]:cue_indptr[i + 1]]
+        trial_outcomes = outcome_ids[outcome_indptr[i]:outcome_indptr[i + 1]]
+
+        # Fill the masking vector for outcomes: the vector contains 0s for all outcomes that don't occur in the
+        # learning trial and the lambda value for all outcomes that do. The cue masking vector contains as many
+        # elements as there are cues in the learning trial: if a cue occurs more than once, its corresponding index
+        # appears more than once
+        outcome_mask[trial_outcomes] = lam
+        if len(trial_outcomes):
+            n_active = max(n_active, int(trial_outcomes.max()) + 1)
+        active_matrix = weight_matrix[:, :n_active]
+
+        # compute the total activation for each outcome given the cues in the current learning trial. In order
+        # to select the cues that are present in the learning trial - and only those - the cue masking vector is
+        # used: it subsets the weight matrix using the indices appended to it, and a row is considered as many
+        # times as its corresponding index occurs in the current trial. Then, a sum is performed column-wise
+        # returning the total activation for all outcomes. The row sum is a gather followed by a reduction, which
+        # only reads the selected rows: a product with an indicator vector of the cues would go through the whole
+        # matrix at every trial, and count repeated cues only once
+        total_v = np.sum(active_matrix[cue_mask], axis=0)
+
+        # compute the change in activation for each outcome using the outcome masking vector (that has a value
+        # of 0 in correspondence of all absent outcomes and a value of lambda in correspondence of all present
+        # outcomes). Given that yet to be experienced outcomes have a total activation of 0 and a lambda value
+        # of 0, no change in association happens for cue-outcome associations involving these outcomes. On the
+        # contrary, known but not present outcomes have a lambda value of 0 (in the outcome mask vector) but a
+        # total activation higher or lower, resulting in a change of association.
+        # The changes overwrite the total activations, which are not needed anymore, so that no other vector as long
+        # as the number of outcomes is allocated at every trial
+        delta_a = np.subtract(outcome_mask[:n_active], total_v, out=total_v)
+        delta_a *= learning_rates[i]
+
+        # sum the vector of changes in association to the weight matrix: each value in delta_a is summed to all
+        # values in the corresponding column of the weight_matrix indicated by cue_mask
+        active_matrix[cue_mask] += delta_a
+        outcome_mask[trial_outcomes] = 0
+
+
+########################################################################################################################
+
+
+def _learn_compiled(weight_matrix, cue_indptr, cue_ids, outcome_indptr, outcome_ids, start, stop, learning_rates, lam):
+
+    """
+    The same as _learn, written as explicit loops to be compiled with Numba: activations, changes in association and
+    updates are computed outcome by outcome, without allocating temporary arrays for each learning trial. Rows of cues
+    occurring more than once in a trial are summed as many times as they occur in the activation but updated once, as
+    with fancy indexing in _learn.
+    """
+
+    n_outcomes = weight_matrix.shape[1]
+    total_v = np.zeros(n_outcomes, dtype=weight_matrix.dtype)
+    outcome_mask = np.zeros(n_outcomes, dtype=weight_matrix.dtype)
+    updated = np.zeros(weight_matrix.shape[0], dtype=np.bool_)
+
+    # associations with outcomes that are yet to be experienced are 0 and do not change, so columns past the highest
+    # index of the outcomes experienced so far can be skipped altogether, while keeping the loops over contiguous
+    # columns (restricting them to the exact set of experienced outcomes was measured to be slower, since the columns
+    # then have to be gathered one by one)
+    n_active = 0
+    for t in range(outcome_indptr[start]):
+        n_active = max(n_active, outcome_ids[t] + 1)
+
+    for i in range(start, stop):
+
+        if learning_rates[i] == 0:
+            continue
+
+        for t in range(outcome_indptr[i], outcome_indptr[i + 1]):
+            outcome_mask[outcome_ids[t]] = lam
+            n_active = max(n_active, outcome_ids[t] + 1)
+
+        total_v[:n_active] = 0.0
+        for t in range(cue_indptr[i], cue_indptr[i + 1]):
+            row = cue_ids[t]
+            for j in range(n_active):
+                total_v[j] += weight_matrix[row, j]
+
+        # turn the total activations into changes in association
+        for j in range(n_active):
+            total_v[j] = (outcome_mask[j] - total_v[j]) * learning_rates[i]
+
+        for t in range(cue_indptr[i], cue_indptr[i + 1]):
+            row = cue_ids[t]
+            if not updated[row]:
+                updated[row] = True
+                for j in range(n_active):
+                    weight_matrix[row, j] += total_v[j]
+
+        for t in range(cue_indptr[i], cue_indptr[i + 1]):
+            updated[cue_ids[t]] = False
+        for t in range(outcome_indptr[i], outcome_indptr[i + 1]):
+            outcome_mask[outcome_ids[t]] = 0.0
+
+
+def _learn_parallel(weight_matrix, cue_indptr, cue_ids, outcome_indptr, outcome_ids, start, stop, learning_rates, lam,
+                    block_size=2048):
+
+    """
+    The same as _learn_compiled, with the columns of the matrix split into blocks of block_size outcomes which are
+    processed in parallel within each learning trial: the activation, change in association and update of an outcome
+    only involve its own column, so threads never write to the same memory and each outcome goes through exactly the
+    same operations as in _learn_compiled. The distinct cues of each trial are collected beforehand, so that no thread
+    needs to keep track of which rows were already updated.
+    """
+
+    n_outcomes = weight_matrix.shape[1]
+    total_v = np.zeros(n_outcomes, dtype=weight_matrix.dtype)
+    outcome_mask = np.zeros(n_outcomes, dtype=weight_matrix.dtype)
+    updated = np.zeros(weight_matrix.shape[0], dtype=np.bool_)
+    unique_rows = np.empty(weight_matrix.shape[0], dtype=cue_ids.dtype)
+
+    n_active = 0
+    for t in range(outcome_indptr[start]):
+        n_active = max(n_active, outcome_ids[t] + 1)
+
+    for i in range(start, stop):
+
+        if learning_rates[i] == 0:
+            continue
+
+        for t in range(outcome_indptr[i], outcome_indptr[i + 1]):
+            outcome_mask[outcome_ids[t]] = lam
+            n_active = max(n_active, outcome_ids[t] + 1)
+
+        n_unique = 0
+        for t in range(cue_indptr[i], cue_indptr[i + 1]):
+            row = cue_ids[t]
+            if not updated[row]:
+                updated[row] = True
+                unique_rows[n_unique] = row
+                n_unique += 1
+        for u in range(n_unique):
+            updated[unique_rows[u]] = False
+
+        for b in prange((n_active + block_size - 1) // block_size):
+            first = b * block_size
+            last = min(first + block_size, n_active)
+            for j in range(first, last):
+                total_v[j] = 0.0
+            for t in range(cue_indptr[i], cue_indptr[i + 1]):
+                row = cue_ids[t]
+                for j in range(first, last):
+                    total_v[j] += weight_matrix[row, j]
+            for j in range(first, last):
+                total_v[j] = (outcome_mask[j] - total_v[j]) * learning_rates[i]
+            for u in range(n_unique):
+                row = unique_rows[u]
+                for j in range(first, last):
+                    weight_matrix[row, j] += total_v[j]
+
+        for t in range(outcome_indptr[i], outcome_indptr[i + 1]):
+            outcome_mask[outcome_ids[t]] = 0.0
+
+
+if njit is not None:
+    _learn_compiled = njit(cache=True)(_learn_compiled)
+    _learn_parallel = njit(parallel=True, cache=True)(_learn_parallel)
+
+
+########################################################################################################################
+
+
+def _learn_gpu(weight_matrix, cue_indptr, cue_ids, outcome_indptr, outcome_ids, start, stop, learning_rates, lam):
+
+    """
+    The same as _learn, with the matrix of associations stored on a GPU as a CuPy array: the indices of the learning
+    trials are copied to the GPU once, so that gathering, summing and updating the rows of the cues in each trial run
+    as GPU kernels over device memory, while the positions of the trials and the number of outcomes experienced so far
+    are still read from the arrays in host memory, without waiting for the GPU.
+    """
+
+    device_cue_ids = cp.asarray(cue_ids)
+    device_outcome_ids = cp.asarray(outcome_ids)
+    outcome_mask = cp.zeros(weight_matrix.shape[1], dtype=weight_matrix.dtype)
+    n_active = int(outcome_ids[:outcome_indptr[start]].max()) + 1 if outcome_indptr[start] else 0
+
+    for i in range(start, stop):
+
+        if learning_rates[i] == 0:
+            continue
+
+        cue_mask = device_cue_ids[cue_indptr[i]:cue_indptr[i + 1]]
+        trial_outcomes = device_outcome_ids[outcome_indptr[i]:outcome_indptr[i + 1]]
+        if outcome_indptr[i + 1] > outcome_indptr[i]:
+            n_active = max(n_active, int(outcome_ids[outcome_indptr[i]:outcome_indptr[i + 1]].max()) + 1)
+
+        outcome_mask[trial_outcomes] = lam
+        active_matrix = weight_matrix[:, :n_active]
+        total_v = active_matrix[cue_mask].sum(axis=0)
+        delta_a = cp.subtract(outcome_mask[:n_active], total_v, out=total_v)
+        delta_a *= learning_rates[i]
+        active_matrix[cue_mask] += delta_a
+        outcome_mask[trial_outcomes] = 0
+
+
+########################################################################################################################
+
+
+def _same_as_previous(indptr, ids):
+
+    """
+    :param indptr:          a NumPy array such that the indices of the i-th learning trial are found between positions
+                            indptr[i] and indptr[i+1] in ids
+    :param ids:             a NumPy array with the indices of all learning trials, as built by trials_to_ids
+    :return:                a boolean NumPy array with one element for each learning trial but the first, True if the
+                            trial consists of the same indices, in the same order, as the previous one
+    """
+
+    lengths = np.diff(indptr)
+
+    # each index is compared with the one at the same position in the previous learning trial, which is found as many
+    # positions back as the trial is long whenever the two trials have the same length
+    previous = np.maximum(np.arange(len(ids)) - np.repeat(lengths, lengths), 0)
+    differing = np.append(ids != ids[previous], False)
+    mismatched = np.logical_or.reduceat(differing, indptr[:-1])
+    mismatched[lengths == 0] = False
+
+    return (lengths[1:] == lengths[:-1]) & ~mismatched[1:]
+
+
+########################################################################################################################
+
+
+def _repetition_rates(cue_indptr, cue_ids, outcome_indptr, outcome_ids, learning_rate, boundaries):
+
+    """
+    :param cue_indptr:          a NumPy array such that the cue indices of the i-th learning trial are found between
+                                positions cue_indptr[i] and cue_indptr[i+1] in cue_ids
+    :param cue_ids:             a NumPy array with the cue indices of all learning trials, as built by trials_to_ids
+    :param outcome_indptr:      a NumPy array such that the outcome indices of the i-th learning trial are found
+                                between positions outcome_indptr[i] and outcome_indptr[i+1] in outcome_ids
+    :param outcome_ids:         a NumPy array with the outcome indices of all learning trials, as built by trials_to_ids
+    :param learning_rate:       the product of alpha and beta
+    :param boundaries:          the indices of the learning trials from which learning is resumed after storing the
+                                matrix, where runs of repeated trials are broken
+    :return learning_rates:     a NumPy array with the learning rate of each learning trial
+
+    Consecutive learning trials with the same cues and outcomes are learned at once. In such a trial with m cue tokens,
+    every cue row changes by learning_rate * (lam - v), v being the total activations, so the total activations of all
+    outcomes (for those not in the trial, lambda is 0) get closer to lambda by a factor of (1 - learning_rate * m). Over
+    k repetitions, each row thus changes by learning_rate * (lam - v) * (1 - (1 - learning_rate * m) ** k) /
+    (learning_rate * m), with v the activations before the first of them: the first trial of each run gets this scaled
+    learning rate, and the other trials a learning rate of 0, so that they are skipped. The resulting associations are
+    the same as when the trials are learned one at a time, up to rounding errors.
+    """
+
+    n_trials = len(cue_indptr) - 1
+    repeated = np.zeros(n_trials, dtype=bool)
+    if n_trials > 1:
+        repeated[1:] = _same_as_previous(cue_indptr, cue_ids) & _same_as_previous(outcome_indptr, outcome_ids)
+    repeated[[b for b in boundaries if b < n_trials]] = False
+
+    heads = np.flatnonzero(~repeated)
+    run_lengths = np.diff(np.append(heads, n_trials))
+    decay = np.float64(learning_rate) * np.diff(cue_indptr)[heads]
+    runs = (run_lengths > 1) & (decay != 0)
+
+    scaling = np.ones(len(heads))
+    scaling[runs] = (1 - (1 - decay[runs]) ** run_lengths[runs]) / decay[runs]
+    learning_rates = np.zeros(n_trials)
+    learning_rates[heads] = np.float64(learning_rate) * scaling
+
+    return learning_rates
+
+
+########################################################################################################################
+
+
+def _save_columns(output_file, weight_matrix, columns, chunk_size=1024):
+
+    """
+    :param output_file:     the path to the .npy file where the matrix is saved
+    :param weight_matrix:   a NumPy array
+    :param columns:         a NumPy array indicating, for each column of the matrix to be saved, which column of the
+                            input array it corresponds to
+    :param chunk_size:      the number of rows whose columns are re-arranged at once
+
+    The columns of the input array are re-arranged into a memory-mapped .npy file a few rows at a time, so that no
+    re-arranged copy of the whole matrix needs to be held in memory.
+    """
+
+    saved = np.lib.format.open_memmap(output_file, mode='w+', dtype=weight_matrix.dtype, shape=weight_matrix.shape)
+    for row in range(0, weight_matrix.shape[0], chunk_size):
+        np.take(weight_matrix[row:row + chunk_size], columns, axis=1, out=saved[row:row + chunk_size])
+    saved.flush()
+    del saved
+
+
+########################################################################################################################
+
+
+def compute_activations(input_file, output_files, alpha, beta, lam, indices, dtype=np.float32, gpu=False):
 
     """
     :param input_file:          the path to a a .json file consisting of two lists of lists, the first containing
@@ -32,94 +370,141 @@ def compute_activations(input_file, output_files, alpha, beta, lam, indices):
                                 acts as a scaling factor, so changing its value has the same effects of changing alpha.
     :param indices:             a list of numbers indicating when to store the matrix of associations to file. The
                                 numbers indicate percentages of the input corpus.
+    :param dtype:               the NumPy floating point type of the matrix of associations. Single precision (default)
+                                is accurate enough for the range of associations estimated by the model, and halves the
+                                memory and the memory traffic needed by the matrix; pass np.float64 for very small
+                                learning rates.
+    :param gpu:                 a boolean specifying whether to estimate associations on a GPU, which requires CuPy
+                                and the matrix of associations to fit in the memory of the GPU (default: False)
+    :return weight_matrices:    a dictionary mapping each time index in indices to the matrix of associations stored at
+                                that time index, memory-mapped read-only from its .npy file
+
+    Only the matrix being estimated is held in memory: at each time index it is written to disk and the stored copy is
+    memory-mapped, so that storing many time indices does not require more memory than storing one.
     """
 
+    if gpu and cp is None:
+        raise ImportError("CuPy is needed to estimate the cue-outcome associations on a GPU.")
+
     folder = os.path.dirname(input_file)
     cue_indices = os.path.join(folder, 'cueIDs.json')
     outcome_indices = os.path.join(folder, 'outcomeIDs.json')
+    trial_indices = os.path.join(folder, 'trialIDs.npz')
+
+    # the corpus is parsed at most once, and not at all if both the mappings and the encoded learning trials are stored
+    corpus = None
 
     if os.path.exists(cue_indices) and os.path.exists(outcome_indices):
-        cues2ids = json.load(open(cue_indices, 'r'))
-        outcomes2ids = json.load(open(outcome_indices, 'r'))
+        with open(cue_indices, 'r') as f:
+            cues2ids = json.load(f)
+        with open(outcome_indices, 'r') as f:
+            outcomes2ids = json.load(f)
     else:
         # get two dictionaries mapping each cue and each outcome from the input corpus to a unique numerical index
-        cues2ids, outcomes2ids = get_cues_and_outcomes(input_file)
-        json.dump(cues2ids, open(cue_indices, 'w'))
-        json.dump(outcomes2ids, open(outcome_indices, 'w'))
+        with open(input_file, 'r') as f:
+            corpus = json.load(f)
+        cues2ids, outcomes2ids = get_cues_and_outcomes(input_file, corpus=corpus)
+        with open(cue_indices, 'w') as f:
+            json.dump(cues2ids, f)
+        with open(outcome_indices, 'w') as f:
+            json.dump(outcomes2ids, f)
+        # indices of learning trials depend on the mappings, so any stored encoding of the trials is out of date
+        if os.path.exists(trial_indices):
+            os.remove(trial_indices)
 
     print()
     print(strftime("%Y-%m-%d %H:%M:%S") + ": number of cues and outcomes in the input corpus estimated.")
     print()
 
     # create an empty matrix with as many rows as there are cues and as many columns as there are outcomes in
-    # input corpus. The indices extracted before will point to a row for cues and to a column for outcomes
-    weight_matrix = np.zeros((len(cues2ids), len(outcomes2ids)))
+    # input corpus. The indices extracted before will point to a row for cues and to a column for outcomes. The matrix
+    # is kept in row-major (C) order: every learning trial reads and updates whole cue rows, which are then contiguous,
+    # while column selections in the analyses are gathered with np.take (see matrix.statistics)
+    weight_matrix = np.zeros((len(cues2ids), len(outcomes2ids)), dtype=dtype)
 
-    # compute the learning rate once and for all, since alpha doesn't change and beta is constant for all cues
-    learning_rate = alpha * beta
+    # compute the learning rate once and for all, since alpha doesn't change and beta is constant for all cues; both
+    # the learning rate and lambda are cast to the type of the matrix, so that all computations are carried out in it
+    learning_rate = weight_matrix.dtype.type(alpha * beta)
+    lam = weight_matrix.dtype.type(lam)
 
     print(strftime("%Y-%m-%d %H:%M:%S") + ": started estimating the cue-outcome associations.")
 
-    corpus = json.load(open(input_file, 'r+'))
+    # map the cues and outcomes of all learning trials to their indices once, and store them so that later runs on the
+    # same corpus can skip reading it altogether. Cues are kept as many times as they occur in a trial, outcomes once.
+    # The size and modification time of the corpus are stored with the indices: if the corpus changed since they were
+    # stored, the learning trials are encoded again
+    corpus_stat = os.stat(input_file)
+    corpus_signature = np.array([corpus_stat.st_size, corpus_stat.st_mtime_ns], dtype=np.int64)
+    cue_indptr = None
+    if os.path.exists(trial_indices):
+        with np.load(trial_indices) as trials:
+            if 'corpus_signature' in trials.files and np.array_equal(trials['corpus_signature'], corpus_signature):
+                cue_indptr, cue_ids = trials['cue_indptr'], trials['cue_ids']
+                outcome_indptr, outcome_ids = trials['outcome_indptr'], trials['outcome_ids']
+    if cue_indptr is None:
+        if corpus is None:
+            with open(input_file, 'r') as f:
+                corpus = json.load(f)
+        cue_indptr, cue_ids = trials_to_ids(corpus[0], cues2ids)
+        outcome_indptr, outcome_ids = trials_to_ids(corpus[1], outcomes2ids, unique=True)
+        np.savez(trial_indices, cue_indptr=cue_indptr, cue_ids=cue_ids,
+                 outcome_indptr=outcome_indptr, outcome_ids=outcome_ids, corpus_signature=corpus_signature)
+        del corpus
+
     # get the total number of learning trials and the line indexes corresponding to each 5% of the corpus to
     # print the advance in processing the input corpus each time an additional 5% of the learning trials is
     # processed
-    total_utterances = len(corpus[0])
-    check_points = {int(np.floor(total_utterances / 100 * n)): n for n in indices}
-
-    for i in range(len(corpus[0])):
-        # get the cues and outcomes in the learning trial
-        trial_cues = list(corpus[0][i])
-        trial_outcomes = set(corpus[1][i])
-
-        # Create a masking vector for outcomes: the vector contains 0s for all outcomes that don't occur in the
-        # learning trial and the lambda value for all outcomes that don't.
-        outcome_mask = np.zeros(len(outcomes2ids))
-        for outcome in trial_outcomes:
-            outcome_mask[outcomes2ids[outcome]] = lam
-
-        # create a masking vector for the cues: this vector contains as many elements as there are cues in the
-        # learning trial. If a cue occurs more than once, its corresponding index will appear more than once
-        cue_mask = []
-        for cue in trial_cues:
-            cue_mask.append(cues2ids[cue])
+    total_utterances = len(cue_indptr) - 1
+    time_indices = sorted(indices)
+    check_points = [int(np.floor(total_utterances / 100 * n)) for n in time_indices]
 
-        # compute the total activation for each outcome given the cues in the current learning trial. In order
-        # to select the cues that are present in the learning trial - and only those - the cue masking vector is
-        # used: it subsets the weight matrix using the indices appended to it, and a row is considered as many
-        # times as its corresponding index occurs in the current trial. Then, a sum is performed column-wise
-        # returning the total activation for all outcomes. The total activation for unknown outcomes, those that
-        # are yet to be experienced, will be 0.
-        total_v = np.sum(weight_matrix[cue_mask], axis=0)
-
-        """
-        exceeding_ids = np.argwhere(total_v > lam)
-        exceeding_lam = total_v[total_v > lam]
-        if total_v[total_v > lam].any():
-            print(strftime("%Y-%m-%d %H:%M:%S") + ": Something went wrong with utterance number %d:" % i)
-            print('outcomes for which activation over cues exceeds lambda: ', exceeding_ids)
-            print('activation for outcomes with activation higher than lambda: ', exceeding_lam)
-            print(trial_cues, trial_outcomes)
-        """
+    # during learning, outcomes are re-numbered in the order in which they are first experienced, so that the outcomes
+    # experienced up to any learning trial occupy the first columns of the matrix, which are the only ones the compiled
+    # learner goes through; stored matrices are re-arranged back so that columns match the indices in outcomes2ids
+    first_occurrence = np.full(len(outcomes2ids), len(outcome_ids))
+    experienced, first_position = np.unique(outcome_ids, return_index=True)
+    first_occurrence[experienced] = first_position
+    learning_order = np.empty(len(outcomes2ids), dtype=np.int64)
+    learning_order[np.argsort(first_occurrence, kind='stable')] = np.arange(len(outcomes2ids))
+    outcome_ids = learning_order[outcome_ids]
 
-        # compute the change in activation for each outcome using the outcome masking vector (that has a value
-        # of 0 in correspondence of all absent outcomes and a value of lambda in correspondence of all present
-        # outcomes). Given that yet to be experienced outcomes have a total activation of 0 and a lambda value
-        # of 0, no change in association happens for cue-outcome associations involving these outcomes. On the
-        # contrary, known but not present outcomes have a lambda value of 0 (in the outcome mask vector) but a
-        # total activation higher or lower, resulting in a change of association.
-        delta_a = (outcome_mask - total_v) * learning_rate
+    # process learning trials up to each check point at once, then report progress and store the matrix; runs of repeated
+    # learning trials within each of these segments are learned at once. Outcomes are split across threads only when
+    # there are enough of them to make up for starting the threads at every trial
+    stops = sorted(set(check_points).union({total_utterances}))
+    learning_rates = _repetition_rates(cue_indptr, cue_ids, outcome_indptr, outcome_ids, learning_rate,
+                                       [0] + stops[:-1]).astype(weight_matrix.dtype)
+    if gpu:
+        learn = _learn_gpu
+        weight_matrix = cp.asarray(weight_matrix)
+    elif njit is None:
+        learn = _learn
+    elif get_num_threads() > 1 and weight_matrix.shape[1] >= 8192:
+        learn = _learn_parallel
+    else:
+        learn = _learn_compiled
+    weight_matrices = {}
+    start = 0
+    next_index = 0
+    for stop in stops:
 
-        # sum the vector of changes in association to the weight matrix: each value in delta_a is summed to all
-        # values in the corresponding column of the weight_matrix indicated by cue_mask
-        weight_matrix[cue_mask] += delta_a
+        learn(weight_matrix, cue_indptr, cue_ids, outcome_indptr, outcome_ids, start, stop, learning_rates, lam)
+        start = stop
+
+        # time indices are sorted, and so are their check points: the next ones to be reached are compared with the
+        # current position, so that time indices falling on the same learning trial are all stored
+        while next_index < len(time_indices) and check_points[next_index] == stop:
 
-        # print to console the progress made by the function
-        if i+1 in check_points:
-            print(strftime("%Y-%m-%d %H:%M:%S") + ": %d%% of the input corpus has been processed."
-                  % check_points[i+1])
+            # print to console the progress made by the function
+            time_index = time_indices[next_index]
+            next_index += 1
+            print(strftime("%Y-%m-%d %H:%M:%S") + ": %d%% of the input corpus has been processed." % time_index)
 
-            if os.path.exists(output_files[check_points[i+1]]):
-                print("The file %s already exists." % output_files[check_points[i+1]])
+            if os.path.exists(output_files[time_index]):
+                print("The file %s already exists." % output_files[time_index])
             else:
-                np.save(output_files[check_points[i+1]], weight_matrix)
+                _save_columns(output_files[time_index], cp.asnumpy(weight_matrix) if gpu else weight_matrix,
+                              learning_order)
+            weight_matrices[time_index] = np.load(output_files[time_index], mmap_mode='r', allow_pickle=False)
+
+    return weight_matrices
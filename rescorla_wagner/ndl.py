@@ -24,7 +24,7 @@ def file_exists(output_files):
 ########################################################################################################################
 
 
-def ndl(input_file, alpha=0.01, beta=0.01, lam=1.0, longitudinal=False):
+def ndl(input_file, alpha=0.01, beta=0.01, lam=1.0, longitudinal=False, dtype=np.float32, gpu=False):
 
     """
     :param input_file:          the path to a a .json file consisting of two lists of lists, the first containing
@@ -44,6 +44,8 @@ def ndl(input_file, alpha=0.01, beta=0.01, lam=1.0, longitudinal=False):
                                 acts as a scaling factor, so changing its value has the same effects of changing alpha.
     :param longitudinal:        a boolean specifying whether to adopt a longitudinal design and store association
                                 matrices at every 10%% of the data, to be able to analyze the time course of learning
+    :param dtype:               the NumPy floating point type of the association matrices (default: single precision)
+    :param gpu:                 a boolean specifying whether to estimate associations on a GPU using CuPy
     :return file_paths:         a dictionary mapping each time index to the file path where the matrix of cue-outcome
                                 associations at that time index is stored
 
@@ -83,7 +85,7 @@ def ndl(input_file, alpha=0.01, beta=0.01, lam=1.0, longitudinal=False):
         # this function writes the matrix of association to file for every time index specified in missing_indices
         # it also writes to json files the dictionary mapping cues to their row indices in the association matrices,
         # and the dictionary mapping outcomes to their column indices in the association matrices
-        compute_activations(input_file, output_files, alpha, beta, lam, missing_indices)
+        compute_activations(input_file, output_files, alpha, beta, lam, missing_indices, dtype=dtype, gpu=gpu)
 
         print(strftime("%Y-%m-%d %H:%M:%S") + ": ... I finished estimating the cue-outcome associations.")
 